@@ -0,0 +1,138 @@
+"""
+Harnais différentiel des moteurs de routage.
+
+Fait passer les mêmes scénarios par chaque moteur de BACKENDS et vérifie :
+    - que le coût annoncé est celui de la référence (à rtol près), ou n'est
+      pas inférieur pour les moteurs non exacts (pénalités de manoeuvre),
+    - que le chemin renvoyé relie bien départ et arrivée et coûte ce qui est
+      annoncé (au plus ce qui est annoncé pour les moteurs non exacts).
+Le temps de construction et de recherche de chaque moteur est relevé.
+
+Usage : python backend_harness.py
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from config import LAT_MIN, LAT_MAX, LON_MIN, LON_MAX
+from routing import NEIGHBOR_OFFSETS, compute_edge_costs, compute_edge_geometry, create_grid
+from routing_backends import BACKENDS, HeadingBackend
+
+# Moteurs comparés par défaut : ceux de BACKENDS, plus la recherche avec cap
+# sans pénalité, qui doit retrouver exactement les coûts de la référence.
+HARNESS_BACKENDS = {
+    **BACKENDS,
+    "heading_p0": lambda: HeadingBackend(penalty_h=0.0),
+}
+
+
+def make_scenarios(seed: int = 0) -> list:
+    """
+    Scénarios synthétiques sur le domaine de config : vent uniforme, vent
+    tournant, vent aléatoire et zone sans vent.
+    """
+    rng = np.random.default_rng(seed)
+    lat2d, lon2d = create_grid(LAT_MIN, LAT_MAX, LON_MIN, LON_MAX, resolution=1.0)
+    shape = lat2d.shape
+    start, end = (11, 33), (3, 6)  # ~ Les Sables -> Horta
+
+    theta = np.radians(lon2d * 8)
+    calm_u = rng.normal(0, 8, shape)
+    calm_v = rng.normal(0, 8, shape)
+    calm_u[4:10, 12:20] = 0.0
+    calm_v[4:10, 12:20] = 0.0
+
+    winds = {
+        "uniforme_ouest": (np.full(shape, 8.0), np.zeros(shape)),
+        "tournant": (10 * np.cos(theta), 10 * np.sin(theta)),
+        "aleatoire": (rng.normal(0, 8, shape), rng.normal(0, 8, shape)),
+        "zone_calme": (calm_u, calm_v),
+    }
+    return [{"name": name, "lat2d": lat2d, "lon2d": lon2d, "u": u, "v": v,
+             "start": start, "end": end}
+            for name, (u, v) in winds.items()]
+
+
+def path_cost(path, costs) -> float:
+    """Coût d'un chemin recalculé depuis les coûts d'arêtes (np.inf si invalide)."""
+    total = 0.0
+    for (i, j), (ni, nj) in zip(path[:-1], path[1:]):
+        offset = (ni - i, nj - j)
+        if offset not in NEIGHBOR_OFFSETS:
+            return np.inf
+        total += costs[NEIGHBOR_OFFSETS.index(offset), i, j]
+    return total
+
+
+def run_harness(scenarios: list, backends: dict = HARNESS_BACKENDS, reference: str = "networkx",
+                rtol: float = 1e-6) -> dict:
+    """
+    Args:
+        scenarios (list): cf. make_scenarios.
+        backends (dict): nom -> fabrique de RoutingBackend.
+        reference (str): moteur dont les coûts font foi.
+        rtol (float): tolérance relative sur les coûts.
+
+    Returns:
+        dict: {
+            'results': [{'scenario', 'backend', 'cost', 'build_s', 'search_s', 'ok'}],
+            'disagreements': [message, ...]
+        }
+    """
+    results = []
+    disagreements = []
+
+    for sc in scenarios:
+        dist, course = compute_edge_geometry(sc["lat2d"], sc["lon2d"])
+        costs = compute_edge_costs(dist, course, sc["u"], sc["v"])
+
+        runs = {}
+        for name, make_backend in backends.items():
+            backend = make_backend()
+            t = time.perf_counter()
+            backend.build(sc["lat2d"], sc["lon2d"], sc["u"], sc["v"])
+            build_s = time.perf_counter() - t
+            t = time.perf_counter()
+            cost, path = backend.shortest_path(sc["start"], sc["end"])
+            search_s = time.perf_counter() - t
+            runs[name] = (backend.exact, cost, path, build_s, search_s)
+
+        ref_cost = runs[reference][1]
+        for name, (exact, cost, path, build_s, search_s) in runs.items():
+            problems = []
+            same_cost = cost == ref_cost or np.isclose(cost, ref_cost, rtol=rtol, atol=0)
+            if exact and not same_cost:
+                problems.append(f"coût {cost:.6f} h != référence {ref_cost:.6f} h")
+            elif not exact and not (same_cost or cost > ref_cost):
+                problems.append(f"coût {cost:.6f} h < référence {ref_cost:.6f} h")
+            if np.isfinite(cost):
+                sailed = path_cost(path, costs) if path else np.inf
+                same_path_cost = np.isclose(sailed, cost, rtol=rtol, atol=0)
+                if not path or path[0] != sc["start"] or path[-1] != sc["end"]:
+                    problems.append("chemin ne reliant pas départ et arrivée")
+                elif not (same_path_cost or (not exact and sailed < cost)):
+                    problems.append(f"chemin de coût {sailed:.6f} h")
+            for problem in problems:
+                disagreements.append(f"[{sc['name']}] {name} : {problem}")
+
+            results.append({"scenario": sc["name"], "backend": name, "cost": cost,
+                            "build_s": build_s, "search_s": search_s, "ok": not problems})
+
+    return {"results": results, "disagreements": disagreements}
+
+
+def print_report(report: dict):
+    print(f"{'scénario':<16}{'moteur':<12}{'coût (h)':>12}{'build (ms)':>12}{'search (ms)':>13}  ok")
+    for r in report["results"]:
+        print(f"{r['scenario']:<16}{r['backend']:<12}{r['cost']:>12.3f}"
+              f"{r['build_s'] * 1e3:>12.1f}{r['search_s'] * 1e3:>13.1f}  {'oui' if r['ok'] else 'NON'}")
+    for message in report["disagreements"]:
+        print("Désaccord :", message)
+
+
+if __name__ == "__main__":
+    report = run_harness(make_scenarios())
+    print_report(report)
+    sys.exit(1 if report["disagreements"] else 0)
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def boat_speed(angle_deg: float, w_speed: float) -> float:
     """
     Polaire simplifiée : vitesse du bateau selon l'angle du vent apparent
@@ -21,3 +24,22 @@ def boat_speed(angle_deg: float, w_speed: float) -> float:
     else:
         # symétrie
         return boat_speed(360 - angle_deg, w_speed)
+
+
+# Polaire tabulée : bornes supérieures des secteurs d'angle (degrés) et
+# coefficient appliqué à la vitesse du vent, identique à boat_speed
+POLAR_ANGLES = np.array([30.0, 60.0, 100.0, 140.0, 165.0, 180.0])
+POLAR_FACTORS = np.array([0.0, 1/3.0, 1/2.0, 2/3.0, 4/5.0, 3/5.0])
+
+
+def boat_speed_array(angle_deg: np.ndarray, w_speed: np.ndarray) -> np.ndarray:
+    """
+    Version vectorisée de boat_speed sur des tableaux numpy.
+    angle_deg : angles vent-bateau (degrés), même convention que boat_speed
+    w_speed : vitesses du vent
+    Retour : vitesses du bateau (noeuds)
+    """
+    angle = np.mod(angle_deg, 360.0)
+    angle = np.where(angle > 180.0, 360.0 - angle, angle)  # symétrie
+    idx = np.searchsorted(POLAR_ANGLES, angle, side="left")
+    return POLAR_FACTORS[idx] * w_speed
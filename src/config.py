@@ -10,6 +10,17 @@ DATA_DIR = Path("./data/raw")  # dossier où sont stockés les fichiers GRIB
 RUN_HOUR = "00"                 # Run GFS : 00, 06, 12, 18
 FORECAST_HOURS = ["000", "006"] # Échéances à télécharger
 RESOLUTION = "0p50"             # Résolution du modèle (0p25, 0p50, 1p00)
+STORE_DIR = Path("./data/store")  # dépôt local des GRIB (cf. grib_store)
+STORE_QUOTA_MB = 2048             # quota disque du dépôt, éviction LRU par run
+
+# === Ingestion des prévisions (cf. ingest) ===
+GFS_AVAILABILITY_DELAY_H = 4.0  # délai entre l'heure du run et sa publication
+INGEST_POLL_S = 30              # période de scrutation du dossier en mode watch
+INGEST_QUEUE_SIZE = 2           # échéances en attente entre deux étapes
+INGEST_RETRY_S = 60             # premier délai avant de retenter une échéance absente
+INGEST_RETRY_MAX_S = 600        # délai maximal entre deux essais (doublé à chaque essai)
+INGEST_DEADLINE_H = 3.0         # durée après laquelle les échéances absentes sont abandonnées
+ROUTING_RESOLUTION = 1.0        # pas de la grille de routage (degrés)
 
 # === Domaine géographique ===
 LAT_MIN = 35.0
@@ -31,6 +42,20 @@ BOAT_POLAR = {
     "running": 7.0         # nœuds au portant
 }
 
+ROUTING_BACKEND = "networkx"  # moteur de routage (cf. routing_backends.BACKENDS)
+TACK_PENALTY_H = 0.1          # temps perdu par virement ou empannage (heures)
+
+GATE_SLACK_H = 6.0            # marge pour dater toute la ligne d'une porte (heures)
+
+# === Optimisation de l'heure de départ ===
+DEPARTURE_INTERVAL_H = 3    # pas entre deux départs candidats (heures)
+DEPARTURE_WINDOW_H = 120    # fenêtre de départ balayée (heures)
+
+# === Cache des routes (cf. route_cache) ===
+ROUTE_CACHE_SIZE = 256                     # entrées gardées en mémoire (LRU)
+ROUTE_CACHE_DIR = Path("./data/cache/routes")  # niveau disque, None pour le désactiver
+DEPARTURE_SLOT_H = 1                       # arrondi des heures de départ (heures)
+
 # === Autres paramètres ===
 DEBUG = True
 
@@ -0,0 +1,107 @@
+"""
+Balayage de l'heure de départ : pour chaque départ candidat, ETA et durée
+de la traversée, puis le meilleur départ.
+
+Le travail commun à tous les départs est fait une seule fois :
+    - vent échantillonné sur la grille et coûts d'arêtes (polaire appliquée)
+      pour chaque pas de temps de la prévision,
+    - recherche arrière depuis l'arrivée sur le dernier pas de temps, qui donne
+      le temps restant exact dès que le bateau dépasse la fin de la prévision.
+Les recherches par départ sont ensuite réparties sur plusieurs processus.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config import DEPARTURE_INTERVAL_H, DEPARTURE_WINDOW_H
+from routing import compute_edge_cost_stack, reverse_dijkstra, time_dependent_dijkstra
+from utils import find_closest_node
+from weather_reader import WindField
+
+# Tables partagées par les processus de calcul (cf. _init_worker)
+_SHARED = {}
+
+
+def _init_worker(costs_stack, times_h, start_node, end_node, tail):
+    _SHARED.update(costs_stack=costs_stack, times_h=times_h,
+                   start=start_node, end=end_node, tail=tail)
+
+
+def _hours(h):
+    return np.timedelta64(int(round(h * 3600)), 's')
+
+
+def _route_from(t0):
+    return time_dependent_dijkstra(_SHARED["costs_stack"], _SHARED["times_h"],
+                                   _SHARED["start"], _SHARED["end"],
+                                   t0=t0, tail=_SHARED["tail"])
+
+
+def sweep_departures(wind: WindField, lat2d, lon2d, start, end,
+                     first_departure=None,
+                     interval_h: float = DEPARTURE_INTERVAL_H,
+                     window_h: float = DEPARTURE_WINDOW_H,
+                     max_workers: int = None) -> dict:
+    """
+    Calcule la route la plus rapide pour une série d'heures de départ.
+
+    Args:
+        wind (WindField): pile temporelle de vent (cf. load_multiple_gribs, extract_wind).
+        lat2d, lon2d: grille de routage (cf. create_grid).
+        start, end (tuple): points (lat, lon) de départ et d'arrivée.
+        first_departure (np.datetime64): premier départ. Par défaut = première échéance.
+        interval_h (float): pas entre deux départs candidats (heures).
+        window_h (float): durée de la fenêtre de départ (heures).
+        max_workers (int): nombre de processus. 1 = calcul séquentiel.
+
+    Returns:
+        dict: {
+            'departures': liste de dicts {'departure', 'eta', 'passage_h', 'path',
+                'extrapolated'},
+            'best': entrée de 'departures' avec la traversée la plus courte (None si aucune)
+        }
+        Un départ postérieur à la dernière échéance est marqué 'extrapolated' :
+        il ne voit que le vent de cette échéance, maintenu constant, et n'est
+        jamais retenu comme 'best'.
+    """
+    times = wind.times
+    times_h = wind.hours()
+    costs_stack = compute_edge_cost_stack(lat2d, lon2d, wind.on_grid(lat2d, lon2d))
+    start_node = find_closest_node(lat2d, lon2d, *start)
+    end_node = find_closest_node(lat2d, lon2d, *end)
+    tail = reverse_dijkstra(costs_stack[-1], end_node)
+
+    if first_departure is None:
+        first_departure = times[0]
+    offset_h = (np.datetime64(first_departure) - times[0]) / np.timedelta64(1, 'h')
+    departures_h = offset_h + np.arange(0.0, window_h + 1e-9, interval_h)
+
+    # Après la dernière échéance, la recherche arrière donne directement le
+    # résultat : seuls les départs antérieurs demandent une recherche complète.
+    shared = (costs_stack, times_h, start_node, end_node, tail)
+    _init_worker(*shared)
+    searched = [t0 for t0 in departures_h if t0 < times_h[-1]]
+    if max_workers == 1 or len(searched) <= 1:
+        results = [_route_from(t0) for t0 in searched]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=shared) as pool:
+            results = list(pool.map(_route_from, searched))
+    results += [_route_from(t0) for t0 in departures_h[len(searched):]]
+
+    entries = []
+    for t0, (arrival_h, path) in zip(departures_h, results):
+        passage_h = arrival_h - t0
+        departure = times[0] + _hours(t0)
+        entries.append({
+            'departure': departure,
+            'eta': departure + _hours(passage_h) if np.isfinite(passage_h) else None,
+            'passage_h': passage_h,
+            'path': path,
+            'extrapolated': t0 > times_h[-1],
+        })
+
+    reachable = [e for e in entries if np.isfinite(e['passage_h']) and not e['extrapolated']]
+    best = min(reachable, key=lambda e: e['passage_h']) if reachable else None
+    return {'departures': entries, 'best': best}
@@ -0,0 +1,311 @@
+"""
+Dépôt local de fichiers GRIB adressé par contenu.
+
+Arborescence :
+    root/manifest.json        index (modèle, run, échéance, zone, variables) -> empreinte
+    root/objects/ab/<sha256>  fichiers GRIB, stockés une seule fois par contenu
+    root/locks/               verrous pour les écritures concurrentes
+    root/access/              un fichier par run, dont la date de modification
+                              est celle du dernier accès (ordre LRU)
+
+Plusieurs processus de téléchargement peuvent partager le même dépôt : toute
+modification du manifeste se fait sous verrou et par remplacement atomique.
+Au-delà du quota, les runs les moins récemment utilisés sont supprimés.
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, List
+
+from config import STORE_DIR, STORE_QUOTA_MB
+
+
+class FileLock:
+    """
+    Verrou inter-processus par fichier (création exclusive).
+
+    Le fichier contient le PID du détenteur et un jeton unique. Un verrou dont
+    le processus n'existe plus est abandonné ; s'il est illisible, il ne l'est
+    qu'au-delà de stale_s. Un verrou abandonné est écarté par renommage
+    atomique, pour ne jamais supprimer celui qu'un autre vient de prendre.
+    """
+
+    def __init__(self, path: Path, timeout: float = 600.0, stale_s: float = 3600.0):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.stale_s = stale_s
+        self._token = None
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        token = f"{os.getpid()} {uuid.uuid4().hex}"
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, token.encode())
+                os.close(fd)
+                self._token = token
+                return self
+            except FileExistsError:
+                if self._break_if_stale():
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Verrou non obtenu : {self.path}")
+                time.sleep(0.1)
+
+    def __exit__(self, *exc):
+        # ne supprime que notre propre verrou
+        if self._read(self.path) == self._token:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+        self._token = None
+
+    @staticmethod
+    def _read(path: Path):
+        try:
+            return path.read_text()
+        except (FileNotFoundError, UnicodeDecodeError):
+            return None
+
+    def _is_stale(self, content: str) -> bool:
+        try:
+            pid = int(content.split()[0])
+        except (IndexError, ValueError):
+            # verrou en cours d'écriture ou corrompu
+            try:
+                return time.time() - self.path.stat().st_mtime > self.stale_s
+            except FileNotFoundError:
+                return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    def _break_if_stale(self) -> bool:
+        """Ecarte le verrou s'il est abandonné ; True si le fichier a disparu."""
+        content = self._read(self.path)
+        if content is None:
+            return True
+        if not self._is_stale(content):
+            return False
+        aside = self.path.with_name(f"{self.path.name}.{uuid.uuid4().hex}.stale")
+        try:
+            os.rename(self.path, aside)
+        except FileNotFoundError:
+            return True
+        if self._read(aside) != content:
+            # un autre processus a repris le verrou entre-temps : on le restaure
+            try:
+                os.link(aside, self.path)
+            except FileExistsError:
+                pass
+        aside.unlink()
+        return True
+
+
+def file_sha256(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class GribStore:
+    """
+    Index local des prévisions téléchargées.
+
+    Args:
+        root: répertoire du dépôt.
+        quota_mb: taille maximale des objets stockés (Mo).
+    """
+
+    def __init__(self, root: Path = STORE_DIR, quota_mb: float = STORE_QUOTA_MB):
+        self.root = Path(root)
+        self.quota_bytes = int(quota_mb * 1024 * 1024)
+        self.objects_dir = self.root / "objects"
+        self.locks_dir = self.root / "locks"
+        self.access_dir = self.root / "access"
+        self.manifest_path = self.root / "manifest.json"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.locks_dir.mkdir(parents=True, exist_ok=True)
+        self.access_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries = {}
+        self._manifest_mtime = None
+
+    # --- Index ---
+
+    @staticmethod
+    def make_key(model: str, run: str, step: str, area: List[float] = None,
+                 variables: List[str] = None) -> str:
+        """Clé normalisée d'une échéance : model|run|step|zone|variables."""
+        area_key = ",".join(f"{float(a):g}" for a in area) if area else "global"
+        vars_key = ",".join(sorted(variables)) if variables else "all"
+        return f"{model}|{run}|{step}|{area_key}|{vars_key}"
+
+    def _reload(self):
+        """Relit le manifeste s'il a été modifié par un autre processus."""
+        try:
+            mtime = self.manifest_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            self._entries, self._manifest_mtime = {}, None
+            return
+        if mtime != self._manifest_mtime:
+            with open(self.manifest_path) as f:
+                self._entries = json.load(f)
+            self._manifest_mtime = mtime
+
+    def _save(self):
+        tmp = self.manifest_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self._entries, f, indent=1)
+        os.replace(tmp, self.manifest_path)
+        self._manifest_mtime = self.manifest_path.stat().st_mtime_ns
+
+    def _manifest_lock(self) -> FileLock:
+        return FileLock(self.locks_dir / "manifest.lock")
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def _access_path(self, model: str, run: str) -> Path:
+        return self.access_dir / hashlib.sha1(f"{model}|{run}".encode()).hexdigest()
+
+    def _touch(self, model: str, run: str):
+        """Date le dernier accès au run sans réécrire le manifeste."""
+        self._access_path(model, run).touch()
+
+    def last_access(self, model: str, run: str) -> float:
+        try:
+            return self._access_path(model, run).stat().st_mtime
+        except FileNotFoundError:
+            return 0.0
+
+    # --- Lecture / écriture ---
+
+    def get(self, model: str, run: str, step: str, area: List[float] = None,
+            variables: List[str] = None):
+        """
+        Chemin du fichier GRIB correspondant, ou None s'il est absent ou
+        incomplet (taille différente de celle enregistrée).
+        Le manifeste n'est relu que s'il a changé et n'est réécrit que pour
+        retirer une entrée invalide.
+        """
+        key = self.make_key(model, run, step, area, variables)
+        self._reload()
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        path = self._object_path(entry["hash"])
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            size = None
+        if size != entry["size"]:
+            with self._manifest_lock():
+                self._reload()
+                if key in self._entries:
+                    print(f"Fichier incomplet ou absent, entrée supprimée : {key}")
+                    self._drop([key])
+                    self._save()
+            return None
+
+        self._touch(model, run)
+        return path
+
+    def put(self, src: Path, model: str, run: str, step: str, area: List[float] = None,
+            variables: List[str] = None) -> Path:
+        """
+        Range un fichier téléchargé dans le dépôt (déplacé, pas copié).
+        Un contenu déjà présent n'est stocké qu'une fois.
+        """
+        src = Path(src)
+        digest = file_sha256(src)
+        size = src.stat().st_size
+        path = self._object_path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        key = self.make_key(model, run, step, area, variables)
+
+        with self._manifest_lock():
+            self._reload()
+            if path.exists():
+                src.unlink()
+            else:
+                os.replace(src, path)
+            self._entries[key] = {
+                "hash": digest,
+                "size": size,
+                "model": model,
+                "run": run,
+            }
+            self._touch(model, run)
+            self._evict(keep_run=(model, run))
+            self._save()
+        return path
+
+    def fetch(self, download: Callable[[Path], None], model: str, run: str, step: str,
+              area: List[float] = None, variables: List[str] = None) -> Path:
+        """
+        Renvoie le fichier du dépôt, en le téléchargeant au besoin.
+
+        Args:
+            download: fonction écrivant le fichier complet au chemin donné.
+                Un seul processus télécharge une même échéance à la fois.
+        """
+        path = self.get(model, run, step, area, variables)
+        if path is not None:
+            print(f"Fichier déjà présent dans le dépôt : {path}")
+            return path
+
+        key = self.make_key(model, run, step, area, variables)
+        key_hash = hashlib.sha1(key.encode()).hexdigest()
+        with FileLock(self.locks_dir / f"{key_hash}.lock"):
+            # un autre processus a pu le télécharger pendant l'attente
+            path = self.get(model, run, step, area, variables)
+            if path is not None:
+                return path
+            tmp = self.root / f"{key_hash}.{os.getpid()}.part"
+            try:
+                download(tmp)
+                return self.put(tmp, model, run, step, area, variables)
+            finally:
+                if tmp.exists():
+                    tmp.unlink()
+
+    # --- Quota ---
+
+    def total_size(self) -> int:
+        objects = {e["hash"]: e["size"] for e in self._entries.values()}
+        return sum(objects.values())
+
+    def _evict(self, keep_run=None):
+        """Supprime les runs les moins récemment utilisés jusqu'à respecter le quota."""
+        runs = {(e["model"], e["run"]) for e in self._entries.values()}
+        runs = {run: self.last_access(*run) for run in runs}
+
+        for run in sorted(runs, key=runs.get):
+            if self.total_size() <= self.quota_bytes:
+                break
+            if run == keep_run:
+                continue
+            self._drop([k for k, e in self._entries.items() if (e["model"], e["run"]) == run])
+            self._access_path(*run).unlink(missing_ok=True)
+            print(f"Run évincé du dépôt : {run[0]} {run[1]}")
+
+    def _drop(self, keys):
+        """Retire des entrées et supprime les objets qui ne sont plus référencés."""
+        hashes = {self._entries.pop(k)["hash"] for k in keys}
+        still_used = {e["hash"] for e in self._entries.values()}
+        for digest in hashes - still_used:
+            self._object_path(digest).unlink(missing_ok=True)
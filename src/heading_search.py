@@ -0,0 +1,189 @@
+"""
+Recherche avec état de cap : pénalité de virement / empannage.
+
+Un état est (noeud, secteur de cap d'arrivée), encodé implicitement par un
+entier state = noeud * N_HEADINGS + secteur. Le secteur START désigne le
+départ, sans cap d'arrivée. Changer d'amure (le vent passe d'un bord à
+l'autre du bateau) coûte penalty_h heures.
+
+La file de priorité est un tas binaire indexé sur tableaux préalloués, avec
+mise à jour de clé, plutôt qu'un graphe NetworkX à noeuds tuples. Les
+tableaux chauds sont des listes Python : l'accès élément par élément y est
+bien plus rapide que sur un tableau numpy.
+"""
+
+from bisect import bisect_right
+
+import numpy as np
+
+from config import TACK_PENALTY_H
+from routing import NEIGHBOR_OFFSETS
+
+START = len(NEIGHBOR_OFFSETS)
+N_HEADINGS = len(NEIGHBOR_OFFSETS) + 1
+
+
+class IndexedMinHeap:
+    """
+    Tas binaire min sur des états entiers 0..n-1, avec diminution de clé.
+    heap : états rangés en tas ; pos : position de chaque état (-1 si absent).
+    """
+
+    __slots__ = ("keys", "heap", "pos", "size")
+
+    def __init__(self, n: int):
+        self.keys = [np.inf] * n
+        self.heap = [0] * n
+        self.pos = [-1] * n
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def push(self, state: int, key: float):
+        """Insère l'état ou diminue sa clé (sans effet si la clé est plus grande)."""
+        p = self.pos[state]
+        if p < 0:
+            p = self.size
+            self.size += 1
+        elif key >= self.keys[state]:
+            return
+        self.keys[state] = key
+        self._sift_up(p, state)
+
+    def pop(self) -> tuple:
+        """Retire l'état de plus petite clé : (clé, état)."""
+        heap = self.heap
+        state = heap[0]
+        self.pos[state] = -1
+        self.size -= 1
+        if self.size:
+            self._sift_down(0, heap[self.size])
+        return self.keys[state], state
+
+    def _sift_up(self, p, state):
+        heap, pos, keys = self.heap, self.pos, self.keys
+        key = keys[state]
+        while p > 0:
+            parent = (p - 1) >> 1
+            other = heap[parent]
+            if keys[other] <= key:
+                break
+            heap[p] = other
+            pos[other] = p
+            p = parent
+        heap[p] = state
+        pos[state] = p
+
+    def _sift_down(self, p, state):
+        heap, pos, keys = self.heap, self.pos, self.keys
+        key = keys[state]
+        n = self.size
+        while True:
+            child = 2 * p + 1
+            if child >= n:
+                break
+            if child + 1 < n and keys[heap[child + 1]] < keys[heap[child]]:
+                child += 1
+            other = heap[child]
+            if keys[other] >= key:
+                break
+            heap[p] = other
+            pos[other] = p
+            p = child
+        heap[p] = state
+        pos[state] = p
+
+
+def compute_wind_side(course, u_wind, v_wind):
+    """
+    Bord d'où vient le vent pour chaque arête : +1 tribord, -1 bâbord.
+    Args:
+        course : caps (8, nlat, nlon) issus de compute_edge_geometry
+        u_wind, v_wind : vent (nlat, nlon)
+    Returns:
+        side : (8, nlat, nlon) int8
+    """
+    wind_dir_deg = (np.arctan2(u_wind, v_wind) * 180 / np.pi + 180) % 360
+    rel = (wind_dir_deg[None, :, :] - course + 180) % 360 - 180
+    return np.where(rel >= 0, 1, -1).astype(np.int8)
+
+
+def heading_dijkstra(costs_stack, side_stack, times_h, start, end, t0=0.0,
+                     penalty_h=TACK_PENALTY_H):
+    """
+    Dijkstra sur les états (noeud, cap d'arrivée) avec pénalité de manoeuvre.
+    Args:
+        costs_stack : (nt, 8, nlat, nlon) cf. compute_edge_cost_stack
+        side_stack : (nt, 8, nlat, nlon) cf. compute_wind_side
+        times_h, start, end, t0 : cf. routing.time_dependent_dijkstra
+        penalty_h : pénalité (heures) quand le vent change de bord
+    Returns:
+        arrival_h : heure d'arrivée (np.inf si inaccessible)
+        path : liste de noeuds (i, j)
+    """
+    nt, nk, nlat, nlon = costs_stack.shape
+    times_h = list(times_h)
+    n_states = nlat * nlon * N_HEADINGS
+
+    # tables par pas de temps converties en listes à la première utilisation
+    cost_lists = [None] * nt
+    side_lists = [None] * nt
+
+    best = [np.inf] * n_states
+    prev = [-1] * n_states
+    # Un état arrivé en t est dominé si le noeud est déjà atteint avant
+    # t - penalty_h par un autre cap : au pire, celui-ci paie une manoeuvre.
+    node_best = [np.inf] * (nlat * nlon)
+    source = (start[0] * nlon + start[1]) * N_HEADINGS + START
+    target = end[0] * nlon + end[1]
+    best[source] = t0
+    queue = IndexedMinHeap(n_states)
+    queue.push(source, t0)
+
+    arrival, via = np.inf, -1
+    while len(queue):
+        t, state = queue.pop()
+        u, heading_in = divmod(state, N_HEADINGS)
+        if u == target:
+            arrival, via = t, state
+            break
+        if t >= node_best[u] + penalty_h:
+            continue
+        if t < node_best[u]:
+            node_best[u] = t
+
+        step = max(bisect_right(times_h, t) - 1, 0)
+        if cost_lists[step] is None:
+            cost_lists[step] = costs_stack[step].reshape(nk, -1).tolist()
+            side_lists[step] = side_stack[step].reshape(nk, -1).tolist()
+        costs, sides = cost_lists[step], side_lists[step]
+
+        i, j = divmod(u, nlon)
+        side_in = sides[heading_in][u] if heading_in != START else 0
+        for k, (di, dj) in enumerate(NEIGHBOR_OFFSETS):
+            c = costs[k][u]
+            if c == np.inf:  # hors grille ou vent debout
+                continue
+            if side_in and sides[k][u] != side_in:
+                c += penalty_h
+            w = (i + di) * nlon + (j + dj)
+            t_new = t + c
+            if t_new >= node_best[w] + penalty_h:
+                continue
+            v = w * N_HEADINGS + k
+            if t_new < best[v]:
+                best[v] = t_new
+                prev[v] = state
+                queue.push(v, t_new)
+
+    if via < 0:
+        return np.inf, []
+
+    path = []
+    state = via
+    while state >= 0:
+        path.append(divmod(state // N_HEADINGS, nlon))
+        state = prev[state]
+    path.reverse()
+    return arrival, [(int(i), int(j)) for i, j in path]
@@ -0,0 +1,387 @@
+"""
+Ingestion des prévisions : artefacts de routage prêts dès l'arrivée d'un run.
+
+Chaque échéance traverse un pipeline à étapes, chacune dans son thread,
+reliées par des files bornées :
+
+    téléchargement -> décodage + découpage -> regrille -> coûts d'arêtes
+
+Les étapes se recouvrent : la première échéance est routable pendant que
+les suivantes sont encore en téléchargement. Deux sources :
+    - ingest_run / schedule : téléchargement GFS, planifié sur config.RUN_HOUR
+    - watch : scrutation de data/raw pour les fichiers GFS déposés par ailleurs
+"""
+
+import queue
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+
+from config import (DATA_DIR, FORECAST_HOURS, GFS_AVAILABILITY_DELAY_H, INGEST_DEADLINE_H,
+                    INGEST_POLL_S, INGEST_QUEUE_SIZE, INGEST_RETRY_MAX_S, INGEST_RETRY_S,
+                    LAT_MAX, LAT_MIN, LON_MAX, LON_MIN, RESOLUTION, ROUTING_RESOLUTION,
+                    RUN_HOUR)
+from grib_store import GribStore
+from route_cache import run_id_from_time
+from routing import (compute_edge_costs, compute_edge_geometry, create_grid,
+                     reverse_dijkstra, time_dependent_dijkstra)
+from weather_dl import download_gfs_data
+from weather_reader import (GFS_WIND_10M, extract_wind, load_grib_file, normalize_longitudes,
+                            subset_domain)
+
+GFS_FILE_PATTERN = re.compile(r"gfs\.t(\d{2})z\.pgrb2\.\w+\.f(\d{3})$")
+
+# Fin de flux entre deux étapes
+_DONE = object()
+
+
+class RoutingArtifacts:
+    """
+    Coûts d'arêtes d'un run, remplis échéance par échéance.
+
+    Le run est complet quand toutes les échéances attendues ont réussi ; une
+    échéance en échec est notée dans errors. Les routes utilisent les
+    échéances déjà prêtes ; au-delà de la dernière, son vent est conservé.
+    """
+
+    def __init__(self, run_id: str, run_time: np.datetime64, lat2d, lon2d,
+                 expected_hours: List[int]):
+        self.run_id = run_id
+        self.run_time = run_time
+        self.lat2d = lat2d
+        self.lon2d = lon2d
+        self.expected_hours = set(expected_hours)
+        self.steps = {}   # heure d'échéance -> coûts (8, nlat, nlon)
+        self.errors = {}  # heure d'échéance -> message d'erreur
+        self.complete = False
+        self.closed = False  # plus aucune échéance n'arrivera
+        self._cond = threading.Condition()
+        # une fois le run complet : pile de coûts et recherches arrière par arrivée
+        self._stack = None
+        self._tails = {}
+
+    def add_step(self, forecast_hour: int, costs) -> bool:
+        """Ajoute une échéance. Renvoie True si elle complète le run."""
+        with self._cond:
+            self.steps[forecast_hour] = costs
+            self.errors.pop(forecast_hour, None)
+            completed = not self.complete and self.expected_hours <= set(self.steps)
+            if completed:
+                self.complete = True
+            self._cond.notify_all()
+        return completed
+
+    def record_error(self, forecast_hour: int, message: str):
+        with self._cond:
+            self.errors[forecast_hour] = message
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def ready_hours(self) -> List[int]:
+        """Echéances prêtes, dans l'ordre."""
+        with self._cond:
+            return sorted(self.steps)
+
+    def wait_for(self, n_steps: int = 1, timeout: float = None) -> bool:
+        """Attend que n_steps échéances soient prêtes (ou la fin du run)."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: len(self.steps) >= n_steps or self.complete or self.closed,
+                timeout=timeout)
+
+    def costs_stack(self) -> tuple:
+        """
+        Returns:
+            (costs, times_h) : (nt, 8, nlat, nlon) et heures d'échéance
+        """
+        if self._stack is not None:
+            return self._stack
+        hours = self.ready_hours()
+        if not hours:
+            raise RuntimeError(f"Aucune échéance prête pour le run {self.run_id}")
+        with self._cond:
+            stack = np.stack([self.steps[h] for h in hours]), [float(h) for h in hours]
+            if self.complete:
+                self._stack = stack
+        return stack
+
+    def route(self, start, end, t0: float = 0.0) -> tuple:
+        """
+        Route la plus rapide entre deux noeuds (i, j) sur les échéances prêtes.
+        t0 : heure de départ, en heures depuis le run.
+        """
+        costs, times_h = self.costs_stack()
+        end = (int(end[0]), int(end[1]))
+        tail = self._tails.get(end)
+        if tail is None:
+            tail = reverse_dijkstra(costs[-1], end)
+            if self._stack is not None:
+                self._tails[end] = tail
+        return time_dependent_dijkstra(costs, times_h, start, end, t0=t0, tail=tail)
+
+
+def latest_run_available(now: datetime, run_hour: str = RUN_HOUR,
+                         delay_h: float = GFS_AVAILABILITY_DELAY_H) -> datetime:
+    """
+    Dernier run run_hour déjà publié à l'instant now.
+    Returns:
+        datetime UTC du run (sa disponibilité est run + delay_h)
+    """
+    run_time = now.replace(hour=int(run_hour), minute=0, second=0, microsecond=0)
+    if run_time + timedelta(hours=delay_h) > now:
+        run_time -= timedelta(days=1)
+    return run_time
+
+
+class IngestPipeline:
+    """
+    Pipeline fetch -> décodage/découpage -> regrille -> coûts d'arêtes.
+
+    Args:
+        store (GribStore): dépôt des GRIB téléchargés.
+        resolution_deg (float): pas de la grille de routage.
+        queue_size (int): nombre d'échéances en attente entre deux étapes.
+        on_step (callable): appelé avec (artifacts, heure) à chaque échéance prête.
+        on_run_complete (callable): appelé avec artifacts quand toutes les échéances
+            d'un run ont réussi (jamais pour un run incomplet).
+    """
+
+    def __init__(self, store: GribStore = None,
+                 resolution_deg: float = ROUTING_RESOLUTION,
+                 queue_size: int = INGEST_QUEUE_SIZE,
+                 on_step: Callable = None,
+                 on_run_complete: Callable = None):
+        self.store = store
+        self.queue_size = queue_size
+        self.on_step = on_step
+        self.on_run_complete = on_run_complete
+
+        # grille et géométrie communes à tous les runs
+        self.lat2d, self.lon2d = create_grid(LAT_MIN, LAT_MAX, LON_MIN, LON_MAX,
+                                             resolution=resolution_deg)
+        self.dist, self.course = compute_edge_geometry(self.lat2d, self.lon2d)
+
+        self.runs = {}  # run_id -> RoutingArtifacts
+        self._runs_lock = threading.Lock()
+        self._threads = []
+        # mode watch : fichiers en cours de traitement / déjà ingérés
+        self._pending = None
+        self._ingested = set()
+        self._watch_hours = FORECAST_HOURS
+
+    # --- Sources ---
+
+    def ingest_run(self, date: str = None, run_hour: str = RUN_HOUR,
+                   forecast_hours: List[str] = FORECAST_HOURS,
+                   retry_s: float = INGEST_RETRY_S,
+                   deadline_h: float = INGEST_DEADLINE_H) -> RoutingArtifacts:
+        """
+        Lance l'ingestion d'un run GFS et rend la main aussitôt.
+        Les artefacts se remplissent au fil des échéances (cf. RoutingArtifacts.wait_for).
+
+        Les échéances pas encore publiées (ou en échec) sont retentées après
+        retry_s, délai doublé à chaque passage, jusqu'à deadline_h heures
+        après le lancement.
+        """
+        if date is None:
+            date = datetime.now(timezone.utc).strftime("%Y%m%d")
+        run_id = f"{date}{run_hour}"
+        artifacts = self._artifacts(run_id, forecast_hours)
+
+        def fetch():
+            deadline = time.monotonic() + deadline_h * 3600
+            delay = retry_s
+            missing = list(forecast_hours)
+            while True:
+                failed = []
+                for fhr in missing:
+                    paths = download_gfs_data(date=date, run_hour=run_hour, forecast_hours=[fhr],
+                                              resolution=RESOLUTION, out_dir=str(DATA_DIR),
+                                              store=self.store)
+                    if not paths:
+                        artifacts.record_error(int(fhr), "téléchargement échoué")
+                        failed.append(fhr)
+                    for path in paths:
+                        yield artifacts, int(fhr), path, None
+                missing = failed
+                if not missing or time.monotonic() + delay > deadline:
+                    return
+                print(f"Run {run_id} : échéances {missing} indisponibles, "
+                      f"nouvel essai dans {delay:.0f} s")
+                time.sleep(delay)
+                delay = min(2 * delay, INGEST_RETRY_MAX_S)
+
+        self._start(fetch(), lambda: [artifacts])
+        return artifacts
+
+    def schedule(self, run_hour: str = RUN_HOUR, once: bool = False,
+                 delay_h: float = GFS_AVAILABILITY_DELAY_H):
+        """
+        Ingère aussitôt le dernier run run_hour publié, puis chaque run
+        suivant dès sa publication.
+        Bloquant ; once=True s'arrête après le premier run.
+        """
+        run_time = latest_run_available(datetime.now(timezone.utc), run_hour, delay_h)
+        while True:
+            self.ingest_run(run_time.strftime("%Y%m%d"), run_hour)
+            self.join()
+            if once:
+                return
+            run_time += timedelta(days=1)
+            available = run_time + timedelta(hours=delay_h)
+            wait_s = (available - datetime.now(timezone.utc)).total_seconds()
+            if wait_s > 0:
+                print(f"Prochain run {run_time:%Y%m%d} {run_hour}z disponible vers "
+                      f"{available:%Y-%m-%d %H:%M} UTC")
+                time.sleep(wait_s)
+
+    def watch(self, directory: Path = DATA_DIR, poll_s: float = INGEST_POLL_S,
+              forecast_hours: List[str] = FORECAST_HOURS, stop: threading.Event = None):
+        """
+        Scrute directory et ingère chaque fichier GFS dès qu'il apparaît.
+        Le run est celui inscrit dans le GRIB, lu au décodage ; il est
+        complet quand toutes les échéances forecast_hours sont ingérées.
+        Un fichier en échec (en cours d'écriture par exemple) est repris
+        au passage suivant.
+        Bloquant jusqu'à stop.set().
+        """
+        stop = stop or threading.Event()
+        self._pending = set()
+        self._ingested = set()
+        self._watch_hours = forecast_hours
+
+        def poll():
+            while not stop.is_set():
+                for path in sorted(Path(directory).iterdir()):
+                    match = GFS_FILE_PATTERN.match(path.name)
+                    if match is None or str(path) in self._pending or str(path) in self._ingested:
+                        continue
+                    self._pending.add(str(path))
+                    # run attribué au décodage (cf. _decode)
+                    yield None, int(match.group(2)), str(path), None
+                stop.wait(poll_s)
+
+        self._start(poll(), lambda: list(self.runs.values()))
+        self.join()
+
+    def join(self):
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    # --- Etapes ---
+
+    def _artifacts(self, run_id: str, forecast_hours: List[str]) -> RoutingArtifacts:
+        with self._runs_lock:
+            if run_id not in self.runs:
+                run_time = np.datetime64(datetime.strptime(run_id, "%Y%m%d%H"))
+                self.runs[run_id] = RoutingArtifacts(run_id, run_time, self.lat2d, self.lon2d,
+                                                     [int(h) for h in forecast_hours])
+            return self.runs[run_id]
+
+    def _decode(self, item):
+        artifacts, fhr, path, _ = item
+        ds = normalize_longitudes(load_grib_file(path, filter_by_keys=GFS_WIND_10M))
+        if artifacts is None:
+            # mode watch : le run est celui du GRIB
+            if 'run_time' not in ds.coords:
+                raise ValueError(f"heure du run absente du GRIB {path}")
+            artifacts = self._artifacts(run_id_from_time(ds['run_time'].values), self._watch_hours)
+        return artifacts, fhr, path, subset_domain(ds, LAT_MIN, LAT_MAX, LON_MIN, LON_MAX)
+
+    def _regrid(self, item):
+        artifacts, fhr, path, ds = item
+        return artifacts, fhr, path, extract_wind(ds).on_grid(self.lat2d, self.lon2d)
+
+    def _precompute(self, item):
+        artifacts, fhr, path, wind = item
+        completed = artifacts.add_step(fhr, compute_edge_costs(self.dist, self.course, *wind.step(0)))
+        self._done(path, ok=True)
+        print(f"Run {artifacts.run_id} : échéance +{fhr:03d}h prête pour le routage")
+        if self.on_step is not None:
+            self.on_step(artifacts, fhr)
+        if completed:
+            self._run_complete(artifacts)
+        return None
+
+    def _done(self, path, ok: bool):
+        """Suivi des fichiers du mode watch : un échec sera repris."""
+        if self._pending is None:
+            return
+        self._pending.discard(path)
+        if ok:
+            self._ingested.add(path)
+
+    def _run_complete(self, artifacts):
+        """Run complet : les runs plus anciens sont libérés, puis notification."""
+        with self._runs_lock:
+            for run_id in [r for r in self.runs if r < artifacts.run_id]:
+                del self.runs[run_id]
+        print(f"Run {artifacts.run_id} complet")
+        if self.on_run_complete is not None:
+            self.on_run_complete(artifacts)
+
+    def _start(self, source, runs: Callable):
+        """
+        Démarre un thread par étape, reliés par des files bornées.
+        runs() donne les runs à clore en fin de flux.
+        """
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(3)]
+
+        def produce():
+            try:
+                for item in source:
+                    queues[0].put(item)
+            finally:
+                queues[0].put(_DONE)
+
+        def stage(fn, q_in, q_out):
+            while True:
+                item = q_in.get()
+                if item is _DONE:
+                    break
+                try:
+                    result = fn(item)
+                except Exception as e:
+                    artifacts, fhr, path = item[:3]
+                    if artifacts is None:
+                        print(f"Erreur d'ingestion ({Path(path).name}) : {e}")
+                    else:
+                        print(f"Erreur d'ingestion (run {artifacts.run_id}, +{fhr:03d}h) : {e}")
+                        artifacts.record_error(fhr, str(e))
+                    self._done(path, ok=False)
+                    continue
+                if q_out is not None:
+                    q_out.put(result)
+            if q_out is not None:
+                q_out.put(_DONE)
+                return
+            for artifacts in runs():
+                artifacts.close()
+                if not artifacts.complete:
+                    missing = sorted(artifacts.expected_hours - set(artifacts.steps))
+                    print(f"Run {artifacts.run_id} incomplet, échéances manquantes : {missing} "
+                          f"({artifacts.errors})")
+
+        threads = [
+            threading.Thread(target=produce, daemon=True),
+            threading.Thread(target=stage, args=(self._decode, queues[0], queues[1]), daemon=True),
+            threading.Thread(target=stage, args=(self._regrid, queues[1], queues[2]), daemon=True),
+            threading.Thread(target=stage, args=(self._precompute, queues[2], None), daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        self._threads += threads
+
+
+if __name__ == "__main__":
+    pipeline = IngestPipeline(store=GribStore())
+    pipeline.schedule()
@@ -1,14 +1,17 @@
 import json
 from config import DATA_DIR, RUN_HOUR, FORECAST_HOURS, RESOLUTION
 from weather_dl import download_ecmwf_wind
+from grib_store import GribStore
 from weather_reader import load_grib_file, subset_domain, extract_wind
 from config import LAT_MIN, LAT_MAX, LON_MIN, LON_MAX
 import xarray as xr
 from visualization import plot_wind_map, plot_wind_map_with_route, plot_wind_and_route
-from routing import build_graph, create_grid, compute_route_metrics_simple
-import networkx as nx
+from routing import create_grid, compute_route_metrics_simple
 from utils import find_closest_node
 from boat_model import boat_speed
+from departure_sweep import sweep_departures
+from routing_backends import get_backend
+from route_cache import RouteCache, normalize_query, run_id_from_time
 
 def load_user_config(path: str = "user_config.json"):
     """
@@ -31,7 +34,8 @@ def main():
         start_date="2025-10-21",
         area=[LAT_MAX, LON_MIN, LAT_MIN, LON_MAX],
         out_dir="data/raw",
-        filename="era5_wind_2025-10-21.grib"
+        filename="era5_wind_2025-10-21.grib",
+        store=GribStore()
     )
     print(f"Fichier téléchargé : {grib_file}\n")
 
@@ -53,11 +57,11 @@ def main():
 
     # Résultats
     print("=== Résumé ===")
-    print("Dimensions u10 :", wind['u'].shape)
-    print("Latitudes :", wind['lat'].values)
-    print("Longitudes :", wind['lon'].values)
-    print("Vitesse du vent (m/s) :", wind['speed'].values)
-    print("Direction du vent :", wind['direction'].values)
+    print("Dimensions u10 :", wind.shape)
+    print("Latitudes :", wind.lat)
+    print("Longitudes :", wind.lon)
+    print("Vitesse du vent (m/s) :", wind.speed(0))
+    print("Direction du vent :", wind.direction(0))
 
     print("\nDonnées prêtes pour l'algorithme de routage !")
 
@@ -67,14 +71,11 @@ def main():
     # Créer la grille
     lat2d, lon2d = create_grid(LAT_MIN, LAT_MAX, LON_MIN, LON_MAX, resolution=1.0)
 
-    # Extraire les composantes du vent
-    wind = extract_wind(ds_subset)
-    u_wind = wind['u'].values[0,:,:]  # premier pas de temps
-    v_wind = wind['v'].values[0,:,:]
+    # Vent aux noeuds de la grille, premier pas de temps
+    grid_wind = wind.on_grid(lat2d, lon2d)
+    u_wind, v_wind = grid_wind.step(0)
 
-    # Construire le graphe
-    G = build_graph(lat2d, lon2d, u_wind, v_wind)
-    print(f"Graphe créé avec {G.number_of_nodes()} noeuds et {G.number_of_edges()} arêtes")
+    backend = get_backend()
 
     # Route la plus courte Dijkstra
 
@@ -85,9 +86,21 @@ def main():
     start_node = find_closest_node(lat2d, lon2d, start_lat, start_lon)
     end_node = find_closest_node(lat2d, lon2d, end_lat, end_lon)
 
-    # Calcul du chemin le plus rapide
-    path = nx.dijkstra_path(G, source=start_node, target=end_node, weight='weight')
-    total_time = nx.dijkstra_path_length(G, source=start_node, target=end_node, weight='weight')
+    # Calcul du chemin le plus rapide (ou lecture du cache)
+    cache = RouteCache()
+    run_id = run_id_from_time(wind.times[0])
+    cache.set_latest_run(run_id)
+    key = normalize_query(lat2d, lon2d, (start_lat, start_lon), (end_lat, end_lon),
+                          wind.times[0], run_id=run_id, options=(backend.name, *backend.params()))
+
+    def compute_route():
+        # le graphe n'est construit qu'en cas d'absence du cache
+        backend.build(lat2d, lon2d, u_wind, v_wind)
+        print(f"Graphe créé ({backend.name}) sur une grille {lat2d.shape[0]} x {lat2d.shape[1]}")
+        return backend.shortest_path(start_node, end_node)
+
+    total_time, path = cache.get_or_compute(key, compute_route)
+    print(f"Cache des routes : {cache.stats()}")
 
     print(f"Chemin trouvé avec {len(path)} étapes, temps total estimé : {total_time:.1f} h")
 
@@ -104,6 +117,14 @@ def main():
           f"vent_u = {u_loc:.1f}, vent_v={v_loc:.1f}") 
     
 
+    # Balayage de l'heure de départ
+    sweep = sweep_departures(wind, lat2d, lon2d, (start_lat, start_lon), (end_lat, end_lon))
+    for entry in sweep['departures']:
+        note = " (au-delà de la prévision)" if entry['extrapolated'] else ""
+        print(f"Départ {entry['departure']} : traversée {entry['passage_h']:.1f} h, ETA {entry['eta']}{note}")
+    if sweep['best'] is not None:
+        print(f"Meilleur départ : {sweep['best']['departure']} "
+              f"({sweep['best']['passage_h']:.1f} h)")
 
     #plot_wind_map_with_route(wind, path_lats, path_lons)
     plot_wind_and_route(
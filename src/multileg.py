@@ -0,0 +1,121 @@
+"""
+Routage multi-étapes : marques de parcours et portes.
+
+Chaque marque est un point (lat, lon) ou une porte ((lat1, lon1), (lat2, lon2))
+traitée comme un segment : tous les noeuds de la grille le long du segment
+permettent de la franchir.
+
+Toutes les étapes partagent la même grille, le même vent et les mêmes coûts
+d'arêtes, calculés une seule fois. Une étape part de la frontière de la
+précédente : chaque noeud de la porte atteint avec son heure d'arrivée, de
+sorte que la porte peut être franchie là où l'étape suivante est la plus rapide.
+"""
+
+import numpy as np
+
+from config import GATE_SLACK_H
+from routing import compute_edge_cost_stack, reverse_dijkstra, time_dependent_search, trace_path
+from utils import find_closest_node
+from weather_reader import WindField
+
+
+def is_gate(mark) -> bool:
+    return len(mark) == 2 and np.ndim(mark[0]) == 1
+
+
+def gate_nodes(lat2d, lon2d, p1, p2) -> list:
+    """
+    Noeuds (i, j) de la grille le long du segment p1 -> p2, dans l'ordre,
+    sans doublons.
+    """
+    resolution = min(abs(lat2d[1, 0] - lat2d[0, 0]), abs(lon2d[0, 1] - lon2d[0, 0]))
+    length = np.hypot(p2[0] - p1[0], p2[1] - p1[1])
+    n = max(int(np.ceil(2 * length / resolution)), 1) + 1
+
+    nodes = []
+    for f in np.linspace(0.0, 1.0, n):
+        node = find_closest_node(lat2d, lon2d, p1[0] + f * (p2[0] - p1[0]),
+                                 p1[1] + f * (p2[1] - p1[1]))
+        node = (int(node[0]), int(node[1]))
+        if node not in nodes:
+            nodes.append(node)
+    return nodes
+
+
+def route_legs(wind: WindField, lat2d, lon2d, start, marks: list,
+               departure=None, gate_slack_h: float = GATE_SLACK_H) -> dict:
+    """
+    Route la plus rapide passant par une suite de marques.
+
+    Args:
+        wind (WindField): pile temporelle de vent (cf. extract_wind).
+        lat2d, lon2d: grille de routage (cf. create_grid).
+        start (tuple): point de départ (lat, lon).
+        marks (list): points (lat, lon) ou portes ((lat1, lon1), (lat2, lon2)),
+            la dernière marque étant l'arrivée.
+        departure (np.datetime64): heure de départ. Par défaut = première échéance.
+        gate_slack_h (float): après le premier franchissement d'une porte, durée
+            pendant laquelle les autres noeuds de la porte restent candidats.
+
+    Returns:
+        dict: {
+            'legs': liste de dicts {'mark', 'node', 'arrival', 'leg_h', 'path'},
+            'eta': heure d'arrivée finale (None si inaccessible),
+            'total_h': durée totale (heures),
+            'path': route complète, liste de noeuds (i, j)
+        }
+    """
+    nlon = lat2d.shape[1]
+    times_h = wind.hours()
+    costs_stack = compute_edge_cost_stack(lat2d, lon2d, wind.on_grid(lat2d, lon2d))
+
+    if departure is None:
+        departure = wind.times[0]
+    t0 = (np.datetime64(departure) - wind.times[0]) / np.timedelta64(1, 'h')
+
+    frontier = {find_closest_node(lat2d, lon2d, *start): t0}
+    searches = []
+    for n, mark in enumerate(marks):
+        last = n == len(marks) - 1
+        if is_gate(mark):
+            targets = gate_nodes(lat2d, lon2d, mark[0], mark[1])
+        else:
+            targets = [find_closest_node(lat2d, lon2d, *mark)]
+
+        # La dernière marque d'arrivée ponctuelle profite de la recherche
+        # arrière au-delà de la fin de la prévision.
+        tail = reverse_dijkstra(costs_stack[-1], targets[0]) if last and len(targets) == 1 else None
+        arrivals, prev = time_dependent_search(costs_stack, times_h, frontier, targets,
+                                               tail=tail, slack_h=0.0 if last else gate_slack_h)
+        if not arrivals:
+            return {'legs': [], 'eta': None, 'total_h': np.inf, 'path': []}
+        searches.append((arrivals, prev, tail))
+        frontier = {divmod(node, nlon): t for node, (t, _) in arrivals.items()}
+
+    # Remontée des étapes depuis la meilleure arrivée
+    node = min(searches[-1][0], key=lambda k: searches[-1][0][k][0])
+    legs = []
+    for mark, (arrivals, prev, tail) in zip(reversed(marks), reversed(searches)):
+        arrival, via = arrivals[node]
+        path = trace_path(prev, via, tail if via != node else None)
+        legs.append({'mark': mark, 'node': divmod(int(node), nlon), 'arrival': arrival,
+                     'path': [divmod(p, nlon) for p in path]})
+        node = path[0]
+    legs.reverse()
+
+    one_second = np.timedelta64(1, 's')
+    start_h = t0
+    full_path = []
+    for leg in legs:
+        leg['leg_h'] = leg['arrival'] - start_h
+        start_h = leg['arrival']
+        leg['arrival'] = wind.times[0] + int(round(leg['arrival'] * 3600)) * one_second
+        full_path += leg['path'] if not full_path else leg['path'][1:]
+
+    total_h = start_h - t0
+    return {
+        'legs': legs,
+        'eta': legs[-1]['arrival'],
+        'total_h': total_h,
+        'path': full_path,
+    }
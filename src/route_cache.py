@@ -0,0 +1,206 @@
+"""
+Cache des routes calculées.
+
+Les requêtes sont normalisées avant d'être comparées : noeuds de grille de
+départ et d'arrivée, créneau de départ arrondi, polaire, run de prévision et
+paramètres de grille. Deux niveaux : LRU en mémoire, puis fichiers pickle
+sur disque rangés par run. Quand un run plus récent est ingéré, les entrées
+des runs précédents sont supprimées des deux niveaux.
+"""
+
+import hashlib
+import pickle
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from boat_model import POLAR_ANGLES, POLAR_FACTORS
+from config import DEPARTURE_SLOT_H, ROUTE_CACHE_DIR, ROUTE_CACHE_SIZE
+from utils import find_closest_node
+
+
+def polar_id() -> str:
+    """Empreinte de la polaire tabulée (cf. boat_model)."""
+    return hashlib.sha1(POLAR_ANGLES.tobytes() + POLAR_FACTORS.tobytes()).hexdigest()[:12]
+
+
+def run_id_from_time(run_time) -> str:
+    """Identifiant 'YYYYMMDDHH' d'un run à partir de son heure."""
+    return np.datetime_as_string(np.datetime64(run_time, 'h'), unit='h').replace('-', '').replace('T', '')
+
+
+def normalize_query(lat2d, lon2d, start, end, departure, run_id: str,
+                    polar: str = None, options: tuple = (),
+                    slot_h: float = DEPARTURE_SLOT_H) -> tuple:
+    """
+    Clé de cache d'une requête de routage.
+
+    Args:
+        lat2d, lon2d: grille de routage.
+        start, end (tuple): points (lat, lon), ramenés au noeud le plus proche.
+        departure (np.datetime64): heure de départ, arrondie au créneau slot_h.
+        run_id (str): identifiant 'YYYYMMDDHH' du run de prévision (cf. run_id_from_time).
+        polar (str): identifiant de la polaire. Par défaut = polar_id().
+        options (tuple): autres paramètres influant sur la route (moteur, pénalité...).
+
+    Returns:
+        tuple: (run_id, départ, arrivée, créneau, polaire, grille, options)
+    """
+    slot = np.timedelta64(int(slot_h * 3600), 's')
+    departure = np.datetime64(departure, 's')
+    epoch = np.datetime64(0, 's')
+    departure_slot = epoch + ((departure - epoch + slot // 2) // slot) * slot
+
+    grid = (float(lat2d[0, 0]), float(lon2d[0, 0]), lat2d.shape,
+            float(lat2d[1, 0] - lat2d[0, 0]), float(lon2d[0, 1] - lon2d[0, 0]))
+    start_node = tuple(int(x) for x in find_closest_node(lat2d, lon2d, *start))
+    end_node = tuple(int(x) for x in find_closest_node(lat2d, lon2d, *end))
+    return (run_id, start_node, end_node, str(departure_slot), polar or polar_id(),
+            grid, tuple(options))
+
+
+class RouteCache:
+    """
+    Cache LRU des routes, avec niveau disque optionnel.
+
+    Args:
+        max_entries (int): taille du niveau mémoire.
+        disk_dir (Path): dossier du niveau disque, None pour s'en passer.
+    """
+
+    def __init__(self, max_entries: int = ROUTE_CACHE_SIZE, disk_dir: Path = ROUTE_CACHE_DIR):
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir is not None else None
+        self.latest_run = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                "hit_rate": self.hit_rate, "entries": len(self._memory)}
+
+    def _disk_path(self, key) -> Path:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return self.disk_dir / str(key[0]) / f"{digest}.pkl"
+
+    def _is_stale(self, key) -> bool:
+        return self.latest_run is not None and key[0] < self.latest_run
+
+    def get(self, key):
+        """Route en cache pour cette clé, ou None (toujours None pour un run dépassé)."""
+        with self._lock:
+            if self._is_stale(key):
+                self.misses += 1
+                return None
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            if path.exists():
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                self._remember(key, value)
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """
+        Garde la route. Un calcul lancé avant l'arrivée d'un run plus récent
+        n'est pas conservé : le fichier n'est publié que si le run est encore
+        le dernier, vérifié sous verrou au moment du renommage.
+        """
+        self._remember(key, value)
+        if self.disk_dir is None or self._is_stale(key):
+            return
+        path = self._disk_path(key)
+        tmp = path.with_name(f"{path.stem}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f)
+        except FileNotFoundError:
+            # dossier du run supprimé entre-temps (cf. set_latest_run)
+            return
+        with self._lock:
+            if self._is_stale(key):
+                tmp.unlink(missing_ok=True)
+                return
+            tmp.replace(path)
+
+    def _remember(self, key, value):
+        with self._lock:
+            if self._is_stale(key):
+                return
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Renvoie la route en cache, sinon la calcule avec compute() et la garde."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    # --- Invalidation ---
+
+    def set_latest_run(self, run_id: str):
+        """
+        Déclare un nouveau run : les entrées des runs plus anciens sont
+        supprimées (identifiants 'YYYYMMDDHH', ordre chronologique = ordre lexical).
+        """
+        with self._lock:
+            if self.latest_run is not None and run_id <= self.latest_run:
+                return
+            self.latest_run = run_id
+            for key in [k for k in self._memory if k[0] < run_id]:
+                del self._memory[key]
+
+        if self.disk_dir is not None and self.disk_dir.exists():
+            for run_dir in self.disk_dir.iterdir():
+                if run_dir.is_dir() and run_dir.name < run_id:
+                    shutil.rmtree(run_dir, ignore_errors=True)
+
+    def on_run_complete(self, artifacts):
+        """Callback pour IngestPipeline(on_run_complete=...)."""
+        self.set_latest_run(artifacts.run_id)
+
+    # --- Routage ---
+
+    def route(self, artifacts, start, end, departure) -> tuple:
+        """
+        Route entre deux points (lat, lon) sur un run ingéré (cf. ingest.RoutingArtifacts),
+        servie depuis le cache si une requête équivalente a déjà été calculée.
+        Tant que le run n'est pas complet, la route n'est pas mise en cache.
+        Returns:
+            (heure d'arrivée depuis le run, liste de noeuds (i, j))
+        """
+        key = normalize_query(artifacts.lat2d, artifacts.lon2d, start, end, departure,
+                              artifacts.run_id, options=("time_dependent",))
+        _, start_node, end_node, slot, _, _, _ = key
+        t0 = (np.datetime64(slot) - artifacts.run_time) / np.timedelta64(1, 'h')
+        if not artifacts.complete:
+            return artifacts.route(start_node, end_node, t0=t0)
+        return self.get_or_compute(key, lambda: artifacts.route(start_node, end_node, t0=t0))
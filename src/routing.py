@@ -1,7 +1,16 @@
+import heapq
+from bisect import bisect_right
+
 import numpy as np
 import networkx as nx
 from utils import haversine
-from boat_model import boat_speed
+from boat_model import boat_speed, boat_speed_array
+
+# Voisinage 8-connectivité, dans le même ordre que build_graph.
+# Tous les tableaux de coûts (k, nlat, nlon) sont indexés dans cet ordre.
+NEIGHBOR_OFFSETS = [(-1, -1), (-1, 0), (-1, 1),
+                    (0, -1),           (0, 1),
+                    (1, -1),  (1, 0),  (1, 1)]
 
 def create_grid(lat_min, lat_max, lon_min, lon_max, resolution=1.0):
     """
@@ -117,3 +126,222 @@ def compute_route_metrics_simple(path, lat2d, lon2d, u_wind, v_wind, boat_speed_
         wind_dir_list.append(wind_dir)
 
     return speeds, angles, course_deg_list, wind_speed_list, wind_dir_list, u_local_list, v_local_list
+
+
+def compute_edge_geometry(lat2d, lon2d):
+    """
+    Distances (milles) et caps (degrés) de chaque arête de la grille.
+    Ne dépend pas du vent : calculé une seule fois par grille.
+    Returns:
+        dist, course : tableaux (8, nlat, nlon), dist = np.inf hors grille.
+            Le cap est aussi renseigné hors grille (celui de la direction k),
+            car il sert à connaître l'amure d'arrivée sur les noeuds du bord.
+    """
+    nlat, nlon = lat2d.shape
+    dlat = lat2d[1, 0] - lat2d[0, 0] if nlat > 1 else 1.0
+    dlon = lon2d[0, 1] - lon2d[0, 0] if nlon > 1 else 1.0
+    dist = np.full((len(NEIGHBOR_OFFSETS), nlat, nlon), np.inf)
+    course = np.empty((len(NEIGHBOR_OFFSETS), nlat, nlon))
+
+    for k, (di, dj) in enumerate(NEIGHBOR_OFFSETS):
+        course[k] = np.degrees(np.arctan2(dj * dlon, di * dlat)) % 360
+
+        # noeuds source dont le voisin (i+di, j+dj) est dans la grille
+        src = (slice(max(0, -di), nlat - max(0, di)), slice(max(0, -dj), nlon - max(0, dj)))
+        dst = (slice(max(0, di), nlat + min(0, di)), slice(max(0, dj), nlon + min(0, dj)))
+
+        dist[k][src] = haversine(lat2d[src], lon2d[src], lat2d[dst], lon2d[dst])
+        dy = lat2d[dst] - lat2d[src]
+        dx = lon2d[dst] - lon2d[src]
+        course[k][src] = np.degrees(np.arctan2(dx, dy)) % 360
+    return dist, course
+
+
+def compute_edge_costs(dist, course, u_wind, v_wind):
+    """
+    Equivalent vectorisé des poids de build_graph pour un pas de temps.
+    Args:
+        dist, course : géométrie issue de compute_edge_geometry
+        u_wind, v_wind : vent (nlat, nlon) aux noeuds de la grille
+    Returns:
+        costs : temps de trajet en heures (8, nlat, nlon), np.inf si infranchissable
+    """
+    wind_dir_deg = (np.arctan2(u_wind, v_wind) * 180 / np.pi + 180) % 360
+    w_speed = np.sqrt(u_wind**2 + v_wind**2)
+
+    angle_rel = (wind_dir_deg[None, :, :] - course) % 360
+    angle_rel = np.where(angle_rel > 180, 360 - angle_rel, angle_rel)
+    speed = boat_speed_array(angle_rel, w_speed[None, :, :])
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        costs = np.where(speed > 0, dist / speed, np.inf)
+    return costs
+
+
+def compute_edge_cost_stack(lat2d, lon2d, wind):
+    """
+    Coûts d'arêtes pour chaque pas de temps d'un champ de vent.
+    La géométrie est partagée entre tous les pas de temps.
+    Args:
+        wind : WindField échantillonné aux noeuds de la grille (cf. WindField.on_grid)
+    Returns:
+        costs : (nt, 8, nlat, nlon)
+    """
+    dist, course = compute_edge_geometry(lat2d, lon2d)
+    return np.stack([compute_edge_costs(dist, course, *wind.step(k))
+                     for k in range(wind.nt)])
+
+
+def reverse_dijkstra(costs, end):
+    """
+    Recherche arrière depuis l'arrivée sur des coûts statiques.
+    Args:
+        costs : (8, nlat, nlon) coûts d'un pas de temps
+        end : noeud (i, j) d'arrivée
+    Returns:
+        time_to_go : (nlat, nlon) temps restant jusqu'à l'arrivée (heures)
+        next_hop : (nlat*nlon,) indice aplati du noeud suivant, -1 si aucun
+    """
+    _, nlat, nlon = costs.shape
+    flat = costs.reshape(len(NEIGHBOR_OFFSETS), -1)
+    time_to_go = np.full(nlat * nlon, np.inf)
+    next_hop = np.full(nlat * nlon, -1, dtype=np.int64)
+
+    target = end[0] * nlon + end[1]
+    time_to_go[target] = 0.0
+    heap = [(0.0, target)]
+
+    while heap:
+        t, v = heapq.heappop(heap)
+        if t > time_to_go[v]:
+            continue
+        i, j = divmod(v, nlon)
+        # arête u -> v avec u = v - offset
+        for k, (di, dj) in enumerate(NEIGHBOR_OFFSETS):
+            ui, uj = i - di, j - dj
+            if not (0 <= ui < nlat and 0 <= uj < nlon):
+                continue
+            u = ui * nlon + uj
+            t_new = t + flat[k, u]
+            if t_new < time_to_go[u]:
+                time_to_go[u] = t_new
+                next_hop[u] = v
+                heapq.heappush(heap, (t_new, u))
+
+    return time_to_go.reshape(nlat, nlon), next_hop
+
+
+def time_dependent_search(costs_stack, times_h, sources, targets, tail=None, slack_h=0.0):
+    """
+    Dijkstra dépendant du temps, multi-sources et multi-cibles : le coût d'une
+    arête est celui du pas de temps en vigueur à l'heure où le bateau quitte
+    le noeud.
+    Args:
+        costs_stack : (nt, 8, nlat, nlon) issu de compute_edge_cost_stack
+        times_h : heures (croissantes) de chaque pas de temps
+        sources : dict {noeud (i, j): heure de départ}
+        targets : noeuds (i, j) cibles
+        tail : résultat de reverse_dijkstra sur le dernier pas de temps, vers
+            l'unique cible. Au-delà de times_h[-1] le vent ne change plus, le
+            temps restant est donc connu exactement et la recherche s'arrête là.
+        slack_h : après la première arrivée, la recherche continue slack_h
+            heures pour dater l'arrivée aux autres cibles (frontière d'une porte)
+    Returns:
+        arrivals : dict {indice aplati de la cible: (heure, indice aplati du
+            dernier noeud atteint par la recherche)}
+        prev : (nlat*nlon,) prédécesseurs aplatis, -1 pour les sources
+    """
+    nt, nk, nlat, nlon = costs_stack.shape
+    flat = costs_stack.reshape(nt, nk, -1)
+    times_h = list(times_h)
+    t_last = times_h[-1]
+    target_set = {i * nlon + j for i, j in targets}
+    if tail is not None and len(target_set) != 1:
+        raise ValueError("tail n'est valable que pour une cible unique")
+
+    best = np.full(nlat * nlon, np.inf)
+    prev = np.full(nlat * nlon, -1, dtype=np.int64)
+    heap = []
+    for (i, j), t0 in sources.items():
+        s = i * nlon + j
+        if t0 < best[s]:
+            best[s] = t0
+            heap.append((t0, s))
+    heapq.heapify(heap)
+
+    arrivals = {}
+    first = np.inf
+    while heap:
+        t, u = heapq.heappop(heap)
+        if t > best[u]:
+            continue
+        if t > first + slack_h or (t >= first and len(arrivals) == len(target_set)):
+            break
+        if u in target_set:
+            if u not in arrivals or t < arrivals[u][0]:
+                arrivals[u] = (t, u)
+            first = min(first, t)
+            continue
+        if tail is not None and t >= t_last:
+            time_to_go, _ = tail
+            candidate = t + time_to_go.flat[u]
+            (target,) = target_set
+            if target not in arrivals or candidate < arrivals[target][0]:
+                arrivals[target] = (candidate, u)
+                first = min(first, candidate)
+            continue
+
+        step = max(bisect_right(times_h, t) - 1, 0)
+        i, j = divmod(u, nlon)
+        for k, (di, dj) in enumerate(NEIGHBOR_OFFSETS):
+            c = flat[step, k, u]
+            if c == np.inf:  # hors grille ou vent debout
+                continue
+            v = (i + di) * nlon + (j + dj)
+            t_new = t + c
+            if t_new < best[v]:
+                best[v] = t_new
+                prev[v] = u
+                heapq.heappush(heap, (t_new, v))
+
+    return arrivals, prev
+
+
+def trace_path(prev, via, tail=None) -> list:
+    """
+    Chemin (indices aplatis) des sources jusqu'à via, prolongé par la
+    recherche arrière tail si via n'est pas la cible.
+    """
+    path = []
+    node = via
+    while node >= 0:
+        path.append(int(node))
+        node = prev[node]
+    path.reverse()
+    if tail is not None:
+        _, next_hop = tail
+        node = next_hop[via]
+        while node >= 0:
+            path.append(int(node))
+            node = next_hop[node]
+    return path
+
+
+def time_dependent_dijkstra(costs_stack, times_h, start, end, t0=0.0, tail=None):
+    """
+    Route la plus rapide entre deux noeuds (cf. time_dependent_search).
+    Args:
+        start, end : noeuds (i, j)
+        t0 : heure de départ (même référence que times_h)
+    Returns:
+        arrival_h : heure d'arrivée (np.inf si inaccessible)
+        path : liste de noeuds (i, j)
+    """
+    nlon = costs_stack.shape[-1]
+    arrivals, prev = time_dependent_search(costs_stack, times_h, {start: t0}, [end], tail=tail)
+    if not arrivals:
+        return np.inf, []
+
+    (target, (arrival, via)), = arrivals.items()
+    path = trace_path(prev, via, tail if via != target else None)
+    return arrival, [divmod(n, nlon) for n in path]
@@ -0,0 +1,120 @@
+"""
+Moteurs de routage interchangeables.
+
+Chaque moteur cache la construction du graphe et la recherche du chemin le
+plus rapide derrière la même interface. NetworkXBackend sert de référence :
+tout nouveau moteur doit donner les mêmes coûts (cf. backend_harness).
+"""
+
+from abc import ABC, abstractmethod
+
+import networkx as nx
+import numpy as np
+
+from config import ROUTING_BACKEND, TACK_PENALTY_H
+from heading_search import compute_wind_side, heading_dijkstra
+from routing import build_graph, compute_edge_costs, compute_edge_geometry, time_dependent_dijkstra
+
+
+class RoutingBackend(ABC):
+    """
+    Interface commune : build() sur un pas de temps de vent aux noeuds de la
+    grille, puis shortest_path() entre deux noeuds (i, j).
+    """
+
+    name = "base"
+    # False si le moteur optimise un autre coût que la référence (pénalités...)
+    exact = True
+
+    def params(self) -> tuple:
+        """Paramètres qui influent sur la route (clé de cache, cf. route_cache)."""
+        return ()
+
+    @abstractmethod
+    def build(self, lat2d, lon2d, u_wind, v_wind):
+        """Prépare la recherche pour un pas de temps de vent."""
+
+    @abstractmethod
+    def shortest_path(self, start, end) -> tuple:
+        """
+        Returns:
+            (temps en heures, liste de noeuds (i, j)) ; (np.inf, []) si inaccessible
+        """
+
+    def route(self, lat2d, lon2d, u_wind, v_wind, start, end) -> tuple:
+        self.build(lat2d, lon2d, u_wind, v_wind)
+        return self.shortest_path(start, end)
+
+
+class NetworkXBackend(RoutingBackend):
+    """Implémentation de référence : graphe NetworkX et Dijkstra."""
+
+    name = "networkx"
+
+    def __init__(self):
+        self.graph = None
+
+    def build(self, lat2d, lon2d, u_wind, v_wind):
+        self.graph = build_graph(lat2d, lon2d, u_wind, v_wind)
+
+    def shortest_path(self, start, end):
+        try:
+            cost, path = nx.single_source_dijkstra(self.graph, start, end, weight='weight')
+        except nx.NetworkXNoPath:
+            return np.inf, []
+        if not np.isfinite(cost):
+            return np.inf, []
+        return cost, [(int(i), int(j)) for i, j in path]
+
+
+class ArrayBackend(RoutingBackend):
+    """Coûts d'arêtes vectorisés et Dijkstra sur tableaux (cf. routing)."""
+
+    name = "array"
+
+    def __init__(self):
+        self.costs = None
+
+    def build(self, lat2d, lon2d, u_wind, v_wind):
+        dist, course = compute_edge_geometry(lat2d, lon2d)
+        self.costs = compute_edge_costs(dist, course, u_wind, v_wind)
+
+    def shortest_path(self, start, end):
+        return time_dependent_dijkstra(self.costs[None], [0.0], start, end)
+
+
+class HeadingBackend(RoutingBackend):
+    """Recherche sur (noeud, cap d'arrivée) avec pénalité de virement (cf. heading_search)."""
+
+    name = "heading"
+
+    def __init__(self, penalty_h: float = TACK_PENALTY_H):
+        self.penalty_h = penalty_h
+        self.exact = penalty_h == 0
+        self.costs = None
+        self.side = None
+
+    def params(self):
+        return (("penalty_h", self.penalty_h),)
+
+    def build(self, lat2d, lon2d, u_wind, v_wind):
+        dist, course = compute_edge_geometry(lat2d, lon2d)
+        self.costs = compute_edge_costs(dist, course, u_wind, v_wind)
+        self.side = compute_wind_side(course, u_wind, v_wind)
+
+    def shortest_path(self, start, end):
+        return heading_dijkstra(self.costs[None], self.side[None], [0.0], start, end,
+                                penalty_h=self.penalty_h)
+
+
+BACKENDS = {
+    NetworkXBackend.name: NetworkXBackend,
+    ArrayBackend.name: ArrayBackend,
+    HeadingBackend.name: HeadingBackend,
+}
+
+
+def get_backend(name: str = ROUTING_BACKEND) -> RoutingBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Moteur de routage inconnu : {name} (disponibles : {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
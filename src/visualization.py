@@ -4,20 +4,14 @@ import cartopy.crs as ccrs
 import cartopy.feature as cfeature
 import numpy as np
 
-def plot_wind_map(wind):
+def plot_wind_map(wind, step=0):
 
-    u = wind['u'].values[0,:,:] if wind['u'].ndim == 3 else wind['u'].values
-    v = wind['v'].values[0,:,:] if wind['v'].ndim == 3 else wind['v'].values
-    lat = wind['lat'].values
-    lon = wind['lon'].values
-    lon2d, lat2d = np.meshgrid(lon, lat)
-    speed = wind['speed'].values[0,:,:] if wind['speed'].ndim == 3 else wind['speed'].values
+    u, v = wind.step(step)
+    lon2d, lat2d = np.meshgrid(wind.lon, wind.lat)
+    speed = wind.speed(step)
 
     # Date de la prévision
-    if 'time' in wind['u'].dims:
-        forecast_time = np.datetime_as_string(wind['u']['time'].values[0], unit='h')
-    else:
-        forecast_time = "Date inconnue"
+    forecast_time = wind.forecast_time(step)
 
     # Créer la figure
     fig = plt.figure(figsize=(12,10))
@@ -58,26 +52,19 @@ def plot_wind_map(wind):
 
     plt.show()
 
-def plot_wind_map_with_route(wind, path_lats=None, path_lons=None):
+def plot_wind_map_with_route(wind, path_lats=None, path_lons=None, step=0):
     import numpy as np
     import matplotlib.pyplot as plt
     import cartopy.crs as ccrs
     import cartopy.feature as cfeature
     import matplotlib as mpl
 
-    u = wind['u'].values[0,:,:] if wind['u'].ndim == 3 else wind['u'].values
-    v = wind['v'].values[0,:,:] if wind['v'].ndim == 3 else wind['v'].values
-    speed = wind['speed'].values[0,:,:] if wind['speed'].ndim == 3 else wind['speed'].values
+    u, v = wind.step(step)
+    speed = wind.speed(step)
 
-    lat_1d = wind['lat'].values
-    lon_1d = wind['lon'].values
+    forecast_time = wind.forecast_time(step)
 
-    if 'time' in wind['u'].dims:
-        forecast_time = np.datetime_as_string(wind['u']['time'].values[0], unit='h')
-    else:
-        forecast_time = "Date inconnue"
-
-    lon2d, lat2d = np.meshgrid(lon_1d, lat_1d)
+    lon2d, lat2d = np.meshgrid(wind.lon, wind.lat)
 
     fig = plt.figure(figsize=(12,10))
     ax = plt.axes(projection=ccrs.PlateCarree())
@@ -149,26 +136,17 @@ def plot_route_with_wind(path, lat2d, lon2d, u_wind, v_wind, path_lats, path_lon
     plt.show()
 
 
-def plot_wind_and_route(wind, path_lats, path_lons, u_path, v_path):
+def plot_wind_and_route(wind, path_lats, path_lons, u_path, v_path, step=0):
     """
     Affiche :
     La carte globale des vents (en haut)
     La route optimale avec les vents locaux (en bas)
     """
-    # On récupère u, v et on calcule la vitesse du vent
-    u = wind["u"].values[0, :, :] if wind["u"].ndim == 3 else wind["u"].values
-    v = wind["v"].values[0, :, :] if wind["v"].ndim == 3 else wind["v"].values
-    wind_speed = np.sqrt(u**2 + v**2)
-
-    lat_1d = wind['lat'].values
-    lon_1d = wind['lon'].values
-
-    if 'time' in wind['u'].dims:
-        forecast_time = np.datetime_as_string(wind['u']['time'].values[0], unit='h')
-    else:
-        forecast_time = "Date inconnue"
+    # Vues sur u, v et vitesse du vent (en cache dans le WindField)
+    u, v = wind.step(step)
+    wind_speed = wind.speed(step)
 
-    lon2d, lat2d = np.meshgrid(lon_1d, lat_1d)
+    lon2d, lat2d = np.meshgrid(wind.lon, wind.lat)
 
     # Création de la figure avec deux sous-cartes
     fig, axes = plt.subplots(
@@ -4,13 +4,15 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import List
 import cdsapi
+from grib_store import GribStore
 
 def download_ecmwf_wind(
         start_date: str = None,
         end_date: str = None,
         area: List[float] = None,
         out_dir: str = "data/raw",
-        filename: str = "ecmwf_wind.grib"
+        filename: str = "ecmwf_wind.grib",
+        store: GribStore = None
 ) -> Path:
     """
     Télécharge les données de vent ECMWF via CDSAPI (ERA5, 10m u/v).
@@ -21,10 +23,44 @@ def download_ecmwf_wind(
         area (List[float]): [North, West, South, East]. Par défaut = zone Atlantique Nord.
         out_dir (str): Répertoire de sauvegarde.
         filename (str): Nom du fichier de sortie.
+        store (GribStore): Dépôt local. Si fourni, remplace out_dir/filename.
 
     Returns:
         Path: Chemin vers le fichier téléchargé.
     """
+    if start_date is None:
+        start_date = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    if end_date is None:
+        end_date = start_date
+    if area is None:
+        # Zone Atlantique Nord approximative
+        area = [50, -30, 35, -5]  # [N, W, S, E]
+
+    variables = ['10m_u_component_of_wind', '10m_v_component_of_wind']
+    times = ['00:00', '06:00', '12:00', '18:00']
+
+    def retrieve(file_path):
+        c = cdsapi.Client()
+        print(f"Téléchargement ECMWF ERA5 : {file_path}")
+        c.retrieve(
+            'reanalysis-era5-single-levels',
+            {
+                'product_type': 'reanalysis',
+                'variable': variables,
+                'year': start_date[:4],
+                'month': start_date[5:7],
+                'day': start_date[8:10],
+                'time': times,
+                'format': 'grib',
+                'area': area
+            },
+            str(file_path)
+        )
+        print("Téléchargement terminé !")
+
+    if store is not None:
+        return store.fetch(retrieve, "era5", start_date, ",".join(times), area, variables)
+
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok = True)
     file_path = out_dir / filename
@@ -32,63 +68,39 @@ def download_ecmwf_wind(
     if file_path.exists():
         print(f"Fichier déjà présent : {file_path}")
         return file_path
-    
-    if start_date is None:
-        start_date = datetime.date.today().strftime("%Y-%m-%d")
-    if end_date is None:
-        end_date = start_date
-    if area is None:
-        # Zone Atlantique Nord approximative
-        area = [50, -30, 35, -5]  # [N, W, S, E]
 
-    c = cdsapi.Client()
-
-    print(f"Téléchargement ECMWF ERA5 : {file_path}")
-    c.retrieve(
-        'reanalysis-era5-single-levels',
-        {
-            'product_type': 'reanalysis',
-            'variable': ['10m_u_component_of_wind', '10m_v_component_of_wind'],
-            'year': start_date[:4],
-            'month': start_date[5:7],
-            'day': start_date[8:10],
-            'time': [
-                '00:00', '06:00', '12:00', '18:00'
-            ],
-            'format': 'grib',
-            'area': area
-        },
-        str(file_path)
-    )
-    print("Téléchargement terminé !")
+    retrieve(file_path)
     return file_path
 
 
-def download_grib(url: str, save_dir: str = "data/raw") -> Path:
+def download_grib(url: str, save_dir: str = "data/raw", file_path: Path = None) -> Path:
     """
     Télécharge un fichier GRIB depuis une URL et le sauvegarde localement.
+    Le fichier est écrit dans un .part puis renommé une fois complet.
 
     Args:
         url (str): URL du fichier GRIB.
         save_dir (str): Répertoire où sauvegarder le fichier. Créé si inexistant.
+        file_path (Path): Chemin de sortie explicite (ignore save_dir).
 
     Returns:
         Path: Chemin vers le fichier téléchargé.
     """
-    save_dir = Path(save_dir)
-    save_dir.mkdir(parents=True, exist_ok=True)
-
-    filename = url.split("/")[-1]
-    file_path = save_dir / filename
+    if file_path is None:
+        save_dir = Path(save_dir)
+        save_dir.mkdir(parents=True, exist_ok=True)
+        file_path = save_dir / url.split("/")[-1]
+    file_path = Path(file_path)
+    part_path = file_path.with_name(file_path.name + ".part")
 
     print(f"Téléchargement de {url} vers {file_path} ...")
 
-    with requests.get(url, stream=True) as r:
+    with requests.get(url, stream=True, timeout=30) as r:
         r.raise_for_status()  # lève une erreur si le téléchargement échoue
         total_size = int(r.headers.get('content-length', 0))
         chunk_size = 1024 * 1024  
 
-        with open(file_path, 'wb') as f:
+        with open(part_path, 'wb') as f:
             downloaded = 0
             for chunk in r.iter_content(chunk_size=chunk_size):
                 if chunk:  
@@ -97,6 +109,11 @@ def download_grib(url: str, save_dir: str = "data/raw") -> Path:
                     percent = downloaded / total_size * 100 if total_size else 0
                     print(f"\rTéléchargé: {percent:.1f}%", end="")
 
+    if total_size and downloaded != total_size:
+        part_path.unlink()
+        raise IOError(f"Téléchargement incomplet : {downloaded}/{total_size} octets pour {url}")
+    os.replace(part_path, file_path)
+
     print("\nTéléchargement terminé !")
     return file_path
 
@@ -105,7 +122,8 @@ def download_gfs_data(
     run_hour: str = "00",
     forecast_hours: List[str] = None,
     resolution: str = "0p50",
-    out_dir: str = "../data/raw"
+    out_dir: str = "../data/raw",
+    store: GribStore = None
 ) -> List[str]:
     """
     Télécharge un ou plusieurs fichiers GFS GRIB2 depuis NOAA NOMADS.
@@ -116,6 +134,7 @@ def download_gfs_data(
         forecast_hours (List[str]): Liste des échéances ('000','006',...)
         resolution (str): Résolution du modèle ('0p25','0p50','1p00')
         out_dir (str): Dossier de sortie
+        store (GribStore): Dépôt local. Si fourni, remplace out_dir.
     Returns:
         List[str]: Liste des chemins des fichiers téléchargés
     """
@@ -134,23 +153,28 @@ def download_gfs_data(
     for fhr in forecast_hours:
         filename = f"gfs.t{run_hour}z.pgrb2.{resolution}.f{fhr}"
         file_path = Path(out_dir) / filename
+        url = f"{base_url}/{filename}"
+
+        if store is not None:
+            try:
+                path = store.fetch(lambda tmp: download_grib(url, file_path=tmp),
+                                   f"gfs-{resolution}", f"{date}{run_hour}", fhr)
+                downloaded_files.append(str(path))
+            except (requests.RequestException, IOError) as e:
+                print(f"Erreur téléchargement {filename} : {e}")
+            continue
 
         if file_path.exists():
             print(f"Fichier déjà présent : {file_path}")
             downloaded_files.append(str(file_path))
             continue
 
-        url = f"{base_url}/{filename}"
-        print(f"Téléchargement : {filename}")
+        # download_grib n'écrit le nom final qu'une fois le fichier complet
         try:
-            response = requests.get(url, stream=True, timeout=30)
-            response.raise_for_status()
-            with open(file_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            download_grib(url, file_path=file_path)
             print(f"Fichier enregistré : {file_path}")
             downloaded_files.append(str(file_path))
-        except requests.RequestException as e:
+        except (requests.RequestException, IOError) as e:
             print(f"Erreur téléchargement {filename} : {e}")
 
     return downloaded_files
@@ -4,17 +4,24 @@ from pathlib import Path
 from datetime import datetime, timezone
 from typing import List
 
+# Vent à 10 m dans les fichiers GFS pgrb2, qui mélangent de nombreux
+# typeOfLevel que cfgrib ne sait pas fusionner en un seul dataset
+GFS_WIND_10M = {"typeOfLevel": "heightAboveGround", "level": 10}
 
-def load_grib_file(path: str, fields: list = ["u10", "v10"]) -> xr.Dataset:
+
+def load_grib_file(path: str, fields: list = ["u10", "v10"],
+                   filter_by_keys: dict = None) -> xr.Dataset:
     """
     Charge un fichier GRIB en xarray.Dataset.
 
     Args:
         path (str): chemin vers le fichier GRIB.
         fields (list): liste des variables à charger, par défaut ['u10','v10'].
+        filter_by_keys (dict): sélection cfgrib des messages à lire (cf. GFS_WIND_10M).
 
     Returns:
-        xr.Dataset: dataset contenant les champs spécifiés et les coordonnées lat/lon.
+        xr.Dataset: dataset contenant les champs spécifiés, les coordonnées lat/lon,
+        l'heure de validité 'time' et, si le GRIB la fournit, l'heure du run 'run_time'.
     """
     path = Path(path)
     if not path.exists():
@@ -23,16 +30,21 @@ def load_grib_file(path: str, fields: list = ["u10", "v10"]) -> xr.Dataset:
     try:
         ds = xr.open_dataset(
             path, 
-            engine="cfgrib"
+            engine="cfgrib",
+            backend_kwargs={"filter_by_keys": filter_by_keys or {}}
         )
         vars_to_keep = [v for v in fields if v in ds.variables]
         ds = ds[vars_to_keep]
 
         if 'time' not in ds.dims:
             if 'valid_time' in ds.variables:
-                time_val = np.datetime64(ds['valid_time'].item())
+                time_val = ds['valid_time'].values
             else:
                 time_val = np.datetime64(datetime.now(timezone.utc))
+            # 'time' scalaire = heure du run, conservée dans 'run_time' ;
+            # 'time' devient l'heure de validité
+            if 'time' in ds.coords:
+                ds = ds.rename({'time': 'run_time'})
             ds = ds.expand_dims(time=[time_val])
 
         return ds
@@ -88,6 +100,16 @@ def subset_domain(ds: xr.Dataset, lat_min: float, lat_max: float,
     )
     return ds_subset
 
+def normalize_longitudes(ds: xr.Dataset) -> xr.Dataset:
+    """
+    Ramène les longitudes de [0, 360) (GFS) à [-180, 180), triées.
+    """
+    lon_name = 'longitude' if 'longitude' in ds.coords else 'lon'
+    if float(ds[lon_name].max()) <= 180:
+        return ds
+    ds = ds.assign_coords({lon_name: ((ds[lon_name] + 180) % 360) - 180})
+    return ds.sortby(lon_name)
+
 def compute_wind_speed_direction(u: xr.DataArray, v: xr.DataArray) -> tuple:
     """
     Calcule la vitesse et la direction du vent à partir des composantes u et v.
@@ -98,39 +120,119 @@ def compute_wind_speed_direction(u: xr.DataArray, v: xr.DataArray) -> tuple:
     return speed, direction
 
 
-def extract_wind(ds: xr.Dataset) -> dict:
+class WindField:
     """
-    Extrait les composantes du vent et éventuellement la vitesse et la direction.
+    Champ de vent compact sur une grille lat/lon régulière.
+
+    u et v sont stockés en float32 contigus de forme (nt, nlat, nlon).
+    La vitesse et la direction sont calculées à la demande puis mises en
+    cache par pas de temps. step() renvoie des vues, sans copie.
+    """
+
+    __slots__ = ("u", "v", "lat", "lon", "times",
+                 "_lat0", "_dlat", "_lon0", "_dlon", "_speed", "_direction")
+
+    def __init__(self, u, v, lat, lon, times=None):
+        u = np.asarray(u, dtype=np.float32)
+        v = np.asarray(v, dtype=np.float32)
+        if u.ndim == 2:
+            u, v = u[None, :, :], v[None, :, :]
+        self.u = np.ascontiguousarray(u)
+        self.v = np.ascontiguousarray(v)
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.times = None if times is None else np.asarray(times, dtype="datetime64[ns]")
+
+        # axes réguliers : indice = (coordonnée - origine) / pas
+        self._lat0 = self.lat[0]
+        self._dlat = self.lat[1] - self.lat[0] if self.lat.size > 1 else 1.0
+        self._lon0 = self.lon[0]
+        self._dlon = self.lon[1] - self.lon[0] if self.lon.size > 1 else 1.0
+        self._speed = {}
+        self._direction = {}
+
+    @property
+    def nt(self) -> int:
+        return self.u.shape[0]
+
+    @property
+    def shape(self) -> tuple:
+        return self.u.shape
+
+    def step(self, k: int = 0) -> tuple:
+        """Vues (u, v) du pas de temps k."""
+        return self.u[k], self.v[k]
+
+    def speed(self, k: int = 0) -> np.ndarray:
+        """Vitesse du vent (m/s) au pas de temps k, en cache."""
+        if k not in self._speed:
+            self._compute(k)
+        return self._speed[k]
+
+    def direction(self, k: int = 0) -> np.ndarray:
+        """Direction du vent (degrés) au pas de temps k, en cache."""
+        if k not in self._direction:
+            self._compute(k)
+        return self._direction[k]
+
+    def _compute(self, k):
+        self._speed[k], self._direction[k] = compute_wind_speed_direction(self.u[k], self.v[k])
+
+    def hours(self) -> np.ndarray:
+        """Echéances en heures depuis la première."""
+        if self.times is None:
+            return np.arange(self.nt, dtype=np.float64)
+        return (self.times - self.times[0]) / np.timedelta64(1, 'h')
+
+    def forecast_time(self, k: int = 0) -> str:
+        if self.times is None:
+            return "Date inconnue"
+        return np.datetime_as_string(self.times[k], unit='h')
+
+    def index_of(self, lat, lon) -> tuple:
+        """
+        Indices (i, j) du point de grille le plus proche, par arithmétique
+        sur les axes (accepte scalaires ou tableaux).
+        """
+        i = np.clip(np.rint((np.asarray(lat) - self._lat0) / self._dlat), 0, self.lat.size - 1)
+        j = np.clip(np.rint((np.asarray(lon) - self._lon0) / self._dlon), 0, self.lon.size - 1)
+        return i.astype(np.intp), j.astype(np.intp)
+
+    def on_grid(self, lat2d: np.ndarray, lon2d: np.ndarray) -> "WindField":
+        """
+        Echantillonne le champ (plus proche voisin) aux noeuds de la grille
+        de routage (cf. routing.create_grid).
+        """
+        i, _ = self.index_of(lat2d[:, 0], 0.0)
+        _, j = self.index_of(0.0, lon2d[0, :])
+        return WindField(self.u[:, i][:, :, j], self.v[:, i][:, :, j],
+                         lat2d[:, 0], lon2d[0, :], self.times)
+
+
+def extract_wind(ds: xr.Dataset) -> WindField:
+    """
+    Extrait les composantes du vent dans un WindField.
 
     Args:
         ds (xr.Dataset): dataset contenant les variables u10 et v10.
 
     Returns:
-        dict: {
-            'u': xr.DataArray,
-            'v': xr.DataArray,
-            'lat': xr.DataArray,
-            'lon': xr.DataArray,
-            'speed': xr.DataArray (optionnel),
-            'direction': xr.DataArray (optionnel)
-        }
+        WindField: u/v (nt, nlat, nlon), axes lat/lon et échéances.
     """
     if 'u10' not in ds.variables or 'v10' not in ds.variables:
         raise ValueError("Les variables u10 et v10 doivent être présentes dans le dataset.")
 
-    u = ds['u10']
-    v = ds['v10']
-    speed, direction = compute_wind_speed_direction(u, v)
-
     # Ajuster les noms des coordonnées
     lat_name = 'latitude' if 'latitude' in ds.coords else 'lat'
     lon_name = 'longitude' if 'longitude' in ds.coords else 'lon'
 
-    return {
-        'u': u,
-        'v': v,
-        'lat': ds[lat_name],
-        'lon': ds[lon_name],
-        'speed': speed,
-        'direction': direction
-    }
\ No newline at end of file
+    dims = [d for d in ('time', lat_name, lon_name) if d in ds['u10'].dims]
+    times = ds['time'].values if 'time' in ds['u10'].dims else None
+
+    return WindField(
+        ds['u10'].transpose(*dims).values,
+        ds['v10'].transpose(*dims).values,
+        ds[lat_name].values,
+        ds[lon_name].values,
+        times
+    )
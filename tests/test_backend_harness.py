@@ -0,0 +1,24 @@
+import pytest
+
+from backend_harness import HARNESS_BACKENDS, make_scenarios, run_harness
+from routing_backends import BACKENDS, RoutingBackend
+
+
+def test_backends_agree_with_reference():
+    report = run_harness(make_scenarios())
+    assert report['disagreements'] == []
+    assert {r['backend'] for r in report['results']} == set(HARNESS_BACKENDS)
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        RoutingBackend()
+
+    class Incomplete(RoutingBackend):
+        def build(self, lat2d, lon2d, u_wind, v_wind):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    for factory in BACKENDS.values():
+        assert isinstance(factory(), RoutingBackend)
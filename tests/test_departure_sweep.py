@@ -0,0 +1,76 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from boat_model import boat_speed, boat_speed_array
+from departure_sweep import sweep_departures
+from routing import (build_graph, compute_edge_cost_stack, compute_edge_costs,
+                     compute_edge_geometry, create_grid, reverse_dijkstra,
+                     time_dependent_dijkstra)
+from weather_reader import WindField
+
+LAT2D, LON2D = create_grid(35.0, 50.0, -35.0, 0.0, resolution=1.0)
+START, END = (46.5, -1.8), (38.5, -28.6)
+
+
+def random_wind(seed=0, nt=4):
+    rng = np.random.default_rng(seed)
+    lat = np.arange(50.0, 34.75, -0.25)
+    lon = np.arange(-35.0, 0.01, 0.25)
+    times = np.datetime64("2025-10-21T00") + np.arange(nt) * np.timedelta64(6, "h")
+    shape = (nt, lat.size, lon.size)
+    return WindField(rng.normal(0, 8, shape), rng.normal(0, 8, shape), lat, lon, times)
+
+
+def test_boat_speed_array_matches_boat_speed():
+    angles = np.concatenate([np.linspace(-180.0, 360.0, 2161), [30.0, 60.0, 100.0, 140.0, 165.0]])
+    expected = [boat_speed(a, 7.0) for a in angles]
+    assert boat_speed_array(angles, 7.0) == pytest.approx(expected)
+
+
+def test_reverse_dijkstra_matches_networkx():
+    rng = np.random.default_rng(1)
+    u, v = rng.normal(0, 8, LAT2D.shape), rng.normal(0, 8, LAT2D.shape)
+    dist, course = compute_edge_geometry(LAT2D, LON2D)
+    time_to_go, next_hop = reverse_dijkstra(compute_edge_costs(dist, course, u, v), (3, 6))
+
+    expected = nx.single_source_dijkstra_path_length(
+        build_graph(LAT2D, LON2D, u, v).reverse(), (3, 6), weight="weight")
+    for (i, j), t in expected.items():
+        assert time_to_go[i, j] == pytest.approx(t)
+    # next_hop mène bien à l'arrivée
+    node = 11 * LAT2D.shape[1] + 33
+    while next_hop[node] >= 0:
+        node = next_hop[node]
+    assert divmod(int(node), LAT2D.shape[1]) == (3, 6)
+
+
+def test_tail_shortcut_matches_full_search():
+    wind = random_wind()
+    costs = compute_edge_cost_stack(LAT2D, LON2D, wind.on_grid(LAT2D, LON2D))
+    times_h = wind.hours()
+    tail = reverse_dijkstra(costs[-1], (3, 6))
+    for t0 in (0.0, 9.0, 18.0, 30.0):
+        full = time_dependent_dijkstra(costs, times_h, (11, 33), (3, 6), t0=t0)
+        short = time_dependent_dijkstra(costs, times_h, (11, 33), (3, 6), t0=t0, tail=tail)
+        assert short[0] == pytest.approx(full[0])
+        assert short[1][0] == (11, 33) and short[1][-1] == (3, 6)
+
+
+def test_pool_matches_sequential():
+    wind = random_wind()
+    sequential = sweep_departures(wind, LAT2D, LON2D, START, END, window_h=18, max_workers=1)
+    pooled = sweep_departures(wind, LAT2D, LON2D, START, END, window_h=18, max_workers=2)
+    assert [e['passage_h'] for e in sequential['departures']] == \
+        [e['passage_h'] for e in pooled['departures']]
+    assert [e['path'] for e in sequential['departures']] == \
+        [e['path'] for e in pooled['departures']]
+
+
+def test_departures_past_forecast_are_flagged_and_not_best():
+    wind = random_wind()  # échéances 0 à 18 h
+    sweep = sweep_departures(wind, LAT2D, LON2D, START, END, interval_h=3, window_h=120,
+                             max_workers=1)
+    flags = [e['extrapolated'] for e in sweep['departures']]
+    assert flags == [t > 18 for t in range(0, 121, 3)]
+    assert sweep['best'] is not None and not sweep['best']['extrapolated']
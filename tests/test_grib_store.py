@@ -0,0 +1,130 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from grib_store import FileLock, GribStore
+
+
+def writer(content):
+    def download(path):
+        path.write_bytes(content)
+    return download
+
+
+@pytest.fixture
+def store(tmp_path):
+    # quota de 2000 octets : deux objets de 1000 octets
+    return GribStore(tmp_path / "store", quota_mb=2000 / (1024 * 1024))
+
+
+def test_fetch_then_get_hits_without_download(store):
+    path = store.fetch(writer(b"a" * 1000), "gfs", "2025102500", "000")
+    assert path.read_bytes() == b"a" * 1000
+    assert store.fetch(lambda p: pytest.fail("téléchargé deux fois"), "gfs", "2025102500", "000") == path
+
+
+def test_same_content_is_stored_once(store):
+    a = store.fetch(writer(b"a" * 1000), "gfs", "2025102500", "000")
+    b = store.fetch(writer(b"a" * 1000), "gfs", "2025102500", "006")
+    assert a == b
+    assert store.total_size() == 1000
+
+
+def test_truncated_object_is_dropped(store):
+    path = store.fetch(writer(b"a" * 1000), "gfs", "2025102500", "000")
+    path.write_bytes(b"a" * 10)
+    assert store.get("gfs", "2025102500", "000") is None
+    assert not path.exists()
+    # nouveau téléchargement complet
+    path = store.fetch(writer(b"a" * 1000), "gfs", "2025102500", "000")
+    assert path.stat().st_size == 1000
+
+
+def test_get_does_not_rewrite_manifest(store):
+    store.fetch(writer(b"a" * 1000), "gfs", "2025102500", "000")
+    mtime = store.manifest_path.stat().st_mtime_ns
+    for _ in range(5):
+        assert store.get("gfs", "2025102500", "000") is not None
+    assert store.manifest_path.stat().st_mtime_ns == mtime
+
+
+def test_least_recently_used_run_is_evicted(store):
+    store.fetch(writer(b"a" * 1000), "gfs", "2025102500", "000")
+    store.fetch(writer(b"b" * 1000), "gfs", "2025102506", "000")
+    # le run 00 est relu après le run 06 : c'est le 06 qui doit partir
+    os.utime(store._access_path("gfs", "2025102506"), (1, 1))
+    assert store.get("gfs", "2025102500", "000") is not None
+
+    store.fetch(writer(b"c" * 1000), "gfs", "2025102512", "000")
+    assert store.get("gfs", "2025102506", "000") is None
+    assert store.get("gfs", "2025102500", "000") is not None
+    assert store.total_size() <= store.quota_bytes
+
+
+def test_file_lock_is_exclusive(tmp_path):
+    lock_path = tmp_path / "test.lock"
+    inside = []
+    overlap = []
+
+    def worker():
+        with FileLock(lock_path, timeout=10):
+            inside.append(1)
+            if len(inside) > 1:
+                overlap.append(1)
+            time.sleep(0.01)
+            inside.pop()
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not overlap
+    assert not lock_path.exists()
+
+
+def dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def test_lock_of_dead_process_is_broken(tmp_path):
+    lock_path = tmp_path / "test.lock"
+    lock_path.write_text(f"{dead_pid()} abc")
+    with FileLock(lock_path, timeout=1):
+        assert lock_path.exists()
+        assert "abc" not in lock_path.read_text()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_old_lock_of_live_process_is_kept(tmp_path):
+    lock_path = tmp_path / "test.lock"
+    lock_path.write_text(f"{os.getpid()} abc")
+    os.utime(lock_path, (1, 1))
+    with pytest.raises(TimeoutError):
+        with FileLock(lock_path, timeout=0.2, stale_s=60):
+            pass
+    assert lock_path.read_text() == f"{os.getpid()} abc"
+
+
+def test_unreadable_lock_is_broken_after_stale_s(tmp_path):
+    lock_path = tmp_path / "test.lock"
+    lock_path.write_text("")
+    with pytest.raises(TimeoutError):
+        with FileLock(lock_path, timeout=0.2, stale_s=60):
+            pass
+    os.utime(lock_path, (1, 1))
+    with FileLock(lock_path, timeout=1, stale_s=60):
+        assert lock_path.exists()
+
+
+def test_release_keeps_a_lock_taken_over_by_another(tmp_path):
+    lock_path = tmp_path / "test.lock"
+    with FileLock(lock_path, timeout=1):
+        lock_path.write_text(f"{os.getpid()} other")
+    assert lock_path.read_text() == f"{os.getpid()} other"
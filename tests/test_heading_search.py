@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from heading_search import compute_wind_side, heading_dijkstra
+from routing import compute_edge_costs, compute_edge_geometry, create_grid, time_dependent_dijkstra
+
+
+def setup_grid(lat2d, lon2d, u, v):
+    dist, course = compute_edge_geometry(lat2d, lon2d)
+    costs = compute_edge_costs(dist, course, u, v)
+    side = compute_wind_side(course, u, v)
+    return costs[None], side[None]
+
+
+def test_boundary_approach_without_tack_is_not_penalised():
+    # Vent uniforme venant du 10° : sur la route (1,0)->(2,1)->(2,2)->(2,3)->(2,4)
+    # le vent reste à bâbord, l'arrivée par le bord nord ne doit rien coûter.
+    lat2d, lon2d = create_grid(45.0, 47.0, -5.0, -1.0, resolution=1.0)
+    wind_from = np.radians(10.0)
+    u = np.full(lat2d.shape, -10.0 * np.sin(wind_from))
+    v = np.full(lat2d.shape, -10.0 * np.cos(wind_from))
+    costs, side = setup_grid(lat2d, lon2d, u, v)
+    start, end = (1, 0), (2, 4)
+
+    free, free_path = heading_dijkstra(costs, side, [0.0], start, end, penalty_h=0.0)
+    assert free_path == [(1, 0), (2, 1), (2, 2), (2, 3), (2, 4)]
+    for penalty_h in (0.1, 5.0):
+        cost, path = heading_dijkstra(costs, side, [0.0], start, end, penalty_h=penalty_h)
+        assert cost == pytest.approx(free)
+        assert path == free_path
+
+
+def test_zero_penalty_matches_heading_free_search():
+    lat2d, lon2d = create_grid(35.0, 50.0, -35.0, 0.0, resolution=1.0)
+    rng = np.random.default_rng(0)
+    u = rng.normal(0, 8, lat2d.shape)
+    v = rng.normal(0, 8, lat2d.shape)
+    costs, side = setup_grid(lat2d, lon2d, u, v)
+
+    expected, _ = time_dependent_dijkstra(costs, [0.0], (11, 33), (3, 6))
+    cost, _ = heading_dijkstra(costs, side, [0.0], (11, 33), (3, 6), penalty_h=0.0)
+    assert cost == pytest.approx(expected)
+
+
+def test_penalty_never_makes_route_faster():
+    lat2d, lon2d = create_grid(35.0, 50.0, -35.0, 0.0, resolution=1.0)
+    rng = np.random.default_rng(1)
+    u = rng.normal(0, 8, lat2d.shape)
+    v = rng.normal(0, 8, lat2d.shape)
+    costs, side = setup_grid(lat2d, lon2d, u, v)
+
+    free, _ = heading_dijkstra(costs, side, [0.0], (11, 33), (3, 6), penalty_h=0.0)
+    cost, _ = heading_dijkstra(costs, side, [0.0], (11, 33), (3, 6), penalty_h=0.5)
+    assert cost >= free
@@ -0,0 +1,188 @@
+import os
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+eccodes = pytest.importorskip("eccodes")
+pytest.importorskip("cfgrib")
+
+import ingest
+from ingest import IngestPipeline, latest_run_available
+from weather_reader import GFS_WIND_10M, load_grib_file
+
+
+def write_gfs_like(path, step_h, seed=0, data_date=20251025, data_time=0):
+    """
+    Petit GRIB2 au format des pgrb2 GFS : plusieurs typeOfLevel mélangés,
+    longitudes 0..355, vent 10 m en heightAboveGround.
+    """
+    rng = np.random.default_rng(seed)
+    fields = [("prmsl", "meanSea", 0), ("t", "isobaricInhPa", 500), ("t", "isobaricInhPa", 850),
+              ("2t", "heightAboveGround", 2), ("10u", "heightAboveGround", 10),
+              ("10v", "heightAboveGround", 10)]
+    with open(path, "wb") as f:
+        for short_name, type_of_level, level in fields:
+            h = eccodes.codes_grib_new_from_samples("regular_ll_sfc_grib2")
+            for key, value in [("Ni", 72), ("Nj", 37),
+                               ("latitudeOfFirstGridPointInDegrees", 90),
+                               ("longitudeOfFirstGridPointInDegrees", 0),
+                               ("latitudeOfLastGridPointInDegrees", -90),
+                               ("longitudeOfLastGridPointInDegrees", 355),
+                               ("iDirectionIncrementInDegrees", 5),
+                               ("jDirectionIncrementInDegrees", 5),
+                               ("dataDate", data_date), ("dataTime", data_time),
+                               ("stepUnits", 1), ("forecastTime", step_h),
+                               ("typeOfLevel", type_of_level), ("level", level),
+                               ("shortName", short_name)]:
+                eccodes.codes_set(h, key, value)
+            eccodes.codes_set_values(h, rng.normal(0, 8, 37 * 72))
+            eccodes.codes_write(h, f)
+            eccodes.codes_release(h)
+    return path
+
+
+def test_decode_gfs_wind_from_mixed_levels(tmp_path):
+    path = write_gfs_like(tmp_path / "gfs.t00z.pgrb2.5p00.f006", 6)
+    ds = load_grib_file(path, filter_by_keys=GFS_WIND_10M)
+    assert set(ds.data_vars) == {"u10", "v10"}
+    assert ds["time"].values[0] == np.datetime64("2025-10-25T06:00")
+    assert ds["run_time"].values == np.datetime64("2025-10-25T00:00")
+
+
+def test_latest_run_available():
+    def at(hour, day=25):
+        return datetime(2025, 10, day, hour, tzinfo=timezone.utc)
+    assert latest_run_available(at(5), "00", 4.0) == at(0)
+    assert latest_run_available(at(3), "00", 4.0) == at(0, day=24)
+    assert latest_run_available(at(3), "18", 4.0) == at(18, day=24)
+
+
+def test_schedule_ingests_latest_published_run_first(monkeypatch):
+    pipeline = IngestPipeline()
+    started = []
+    monkeypatch.setattr(pipeline, "ingest_run", lambda date, run_hour: started.append(date))
+    monkeypatch.setattr(ingest.time, "sleep", lambda s: pytest.fail("attente inutile"))
+    expected = latest_run_available(datetime.now(timezone.utc), "00", 4.0)
+    pipeline.schedule("00", once=True, delay_h=4.0)
+    assert started == [f"{expected:%Y%m%d}"]
+
+
+@pytest.fixture
+def gfs_files(tmp_path, monkeypatch):
+    """download_gfs_data remplacé par des fichiers locaux ; f012 est illisible."""
+    files = {}
+    for fhr in ["000", "006"]:
+        files[fhr] = str(write_gfs_like(tmp_path / f"gfs.t00z.pgrb2.5p00.f{fhr}", int(fhr)))
+    broken = tmp_path / "gfs.t00z.pgrb2.5p00.f012"
+    broken.write_bytes(b"GRIB tronque")
+    files["012"] = str(broken)
+
+    def fake_download(date, run_hour, forecast_hours, **kwargs):
+        return [files[fhr] for fhr in forecast_hours]
+
+    monkeypatch.setattr(ingest, "download_gfs_data", fake_download)
+    return files
+
+
+def test_complete_run_notifies_and_routes(gfs_files):
+    completed = []
+    pipeline = IngestPipeline(on_run_complete=completed.append)
+    artifacts = pipeline.ingest_run("20251025", "00", ["000", "006"])
+    pipeline.join()
+
+    assert completed == [artifacts]
+    assert artifacts.complete and artifacts.ready_hours() == [0, 6]
+    cost, path = artifacts.route((11, 33), (3, 6))
+    assert path[0] == (11, 33) and path[-1] == (3, 6)
+    # pile et recherche arrière réutilisées une fois le run complet
+    assert artifacts.costs_stack() is artifacts.costs_stack()
+    assert (3, 6) in artifacts._tails
+
+
+def test_failed_step_does_not_complete_run(gfs_files):
+    completed = []
+    pipeline = IngestPipeline(on_run_complete=completed.append)
+    artifacts = pipeline.ingest_run("20251025", "00", ["000", "006", "012"])
+    pipeline.join()
+
+    assert completed == []
+    assert not artifacts.complete and artifacts.closed
+    assert set(artifacts.errors) == {12}
+
+
+def test_missing_step_is_retried_until_published(gfs_files, monkeypatch):
+    calls = []
+
+    def late_download(date, run_hour, forecast_hours, **kwargs):
+        calls.append(forecast_hours[0])
+        if forecast_hours == ["006"] and calls.count("006") < 3:
+            return []  # pas encore publiée (404)
+        return [gfs_files[fhr] for fhr in forecast_hours]
+
+    monkeypatch.setattr(ingest, "download_gfs_data", late_download)
+    completed = []
+    pipeline = IngestPipeline(on_run_complete=completed.append)
+    artifacts = pipeline.ingest_run("20251025", "00", ["000", "006"], retry_s=0.01)
+    pipeline.join()
+
+    assert calls == ["000", "006", "006", "006"]
+    assert completed == [artifacts] and artifacts.errors == {}
+
+
+def test_missing_step_is_abandoned_after_deadline(gfs_files, monkeypatch):
+    def no_006(date, run_hour, forecast_hours, **kwargs):
+        return [] if forecast_hours == ["006"] else [gfs_files[fhr] for fhr in forecast_hours]
+
+    monkeypatch.setattr(ingest, "download_gfs_data", no_006)
+    pipeline = IngestPipeline()
+    artifacts = pipeline.ingest_run("20251025", "00", ["000", "006"],
+                                    retry_s=0.01, deadline_h=0.05 / 3600)
+    pipeline.join()
+
+    assert artifacts.closed and not artifacts.complete
+    assert set(artifacts.errors) == {6}
+
+
+def test_newer_complete_run_drops_older_runs(gfs_files):
+    pipeline = IngestPipeline()
+    pipeline.ingest_run("20251024", "00", ["000", "006"])
+    pipeline.join()
+    assert list(pipeline.runs) == ["2025102400"]
+    pipeline.ingest_run("20251025", "00", ["000", "006"])
+    pipeline.join()
+    assert list(pipeline.runs) == ["2025102500"]
+
+
+def test_watch_completes_run_and_retries_failed_file(tmp_path):
+    raw = tmp_path / "raw"
+    raw.mkdir()
+    # run de 18z dont les fichiers arrivent après minuit
+    after_midnight = datetime(2025, 10, 26, 1, tzinfo=timezone.utc).timestamp()
+    first = write_gfs_like(raw / "gfs.t18z.pgrb2.5p00.f000", 0, data_time=1800)
+    os.utime(first, (after_midnight, after_midnight))
+    # f006 encore en cours d'écriture au premier passage
+    (raw / "gfs.t18z.pgrb2.5p00.f006").write_bytes(b"GRIB en cours")
+
+    stop = threading.Event()
+    completed = []
+
+    def on_step(artifacts, fhr):
+        if fhr == 0:
+            write_gfs_like(raw / "gfs.t18z.pgrb2.5p00.f006", 6, data_time=1800)
+
+    def on_run_complete(artifacts):
+        completed.append(artifacts)
+        stop.set()
+
+    pipeline = IngestPipeline(on_step=on_step, on_run_complete=on_run_complete)
+    watcher = threading.Thread(target=pipeline.watch,
+                               kwargs={"directory": raw, "poll_s": 0.05,
+                                       "forecast_hours": ["000", "006"], "stop": stop})
+    watcher.start()
+    watcher.join(timeout=30)
+
+    assert not watcher.is_alive()
+    assert len(completed) == 1 and completed[0].ready_hours() == [0, 6]
+    assert completed[0].run_id == "2025102518"
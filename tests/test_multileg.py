@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from multileg import gate_nodes, route_legs
+from routing import (compute_edge_cost_stack, create_grid, reverse_dijkstra,
+                     time_dependent_dijkstra, time_dependent_search)
+from weather_reader import WindField
+
+LAT2D, LON2D = create_grid(0.0, 10.0, 0.0, 10.0, resolution=1.0)
+NLON = LAT2D.shape[1]
+TIMES = np.datetime64("2025-10-21T00") + np.arange(4) * np.timedelta64(6, "h")
+
+
+def grid_wind(u, v):
+    shape = (TIMES.size, *LAT2D.shape)
+    return WindField(np.broadcast_to(u, shape), np.broadcast_to(v, shape),
+                     LAT2D[:, 0], LON2D[0, :], TIMES)
+
+
+def random_wind(seed=0):
+    rng = np.random.default_rng(seed)
+    shape = (TIMES.size, *LAT2D.shape)
+    return grid_wind(rng.normal(0, 8, shape), rng.normal(0, 8, shape))
+
+
+def point(node):
+    return (float(LAT2D[node]), float(LON2D[node]))
+
+
+def direct(wind, start, end, t0=0.0):
+    costs = compute_edge_cost_stack(LAT2D, LON2D, wind)
+    tail = reverse_dijkstra(costs[-1], end)
+    return time_dependent_dijkstra(costs, wind.hours(), start, end, t0=t0, tail=tail)
+
+
+def test_single_point_mark_matches_direct_route():
+    wind = random_wind()
+    arrival, path = direct(wind, (1, 1), (9, 8))
+    result = route_legs(wind, LAT2D, LON2D, point((1, 1)), [point((9, 8))])
+    assert result['total_h'] == pytest.approx(arrival)
+    assert result['path'] == path
+
+
+def test_mark_on_direct_route_does_not_change_it():
+    wind = random_wind()
+    arrival, path = direct(wind, (1, 1), (9, 8))
+    mark = path[len(path) // 2]
+    result = route_legs(wind, LAT2D, LON2D, point((1, 1)), [point(mark), point((9, 8))])
+    assert result['total_h'] == pytest.approx(arrival)
+    assert [leg['node'] for leg in result['legs']] == [mark, (9, 8)]
+
+
+def test_each_leg_starts_where_and_when_previous_ended():
+    wind = random_wind(seed=3)
+    costs = compute_edge_cost_stack(LAT2D, LON2D, wind)
+    marks = [(2, 8), (8, 8), (8, 2)]
+    result = route_legs(wind, LAT2D, LON2D, point((1, 1)), [point(m) for m in marks])
+
+    node, t = (1, 1), 0.0
+    for n, leg in enumerate(result['legs']):
+        assert leg['path'][0] == node
+        last = n == len(marks) - 1
+        tail = reverse_dijkstra(costs[-1], marks[n]) if last else None
+        arrival, _ = time_dependent_dijkstra(costs, wind.hours(), node, marks[n], t0=t, tail=tail)
+        assert leg['leg_h'] == pytest.approx(arrival - t)
+        node, t = leg['node'], arrival
+    assert result['total_h'] == pytest.approx(t)
+    assert sum(leg['leg_h'] for leg in result['legs']) == pytest.approx(result['total_h'])
+
+
+def test_gate_is_crossed_where_the_next_leg_is_fastest():
+    # vent de nord : le bord est du parcours se fait vent de travers
+    wind = grid_wind(0.0, -10.0)
+    gate = (point((10, 5)), point((0, 5)))
+    end = (1, 7)
+    result = route_legs(wind, LAT2D, LON2D, point((9, 0)), [gate, point(end)],
+                        gate_slack_h=1e6)
+
+    costs = compute_edge_cost_stack(LAT2D, LON2D, wind)
+    times_h = wind.hours()
+    nodes = gate_nodes(LAT2D, LON2D, *gate)
+    reached, _ = time_dependent_search(costs, times_h, {(9, 0): 0.0}, nodes, slack_h=1e6)
+    first = min(reached, key=lambda k: reached[k][0])
+    totals = {divmod(k, NLON): direct(wind, divmod(k, NLON), end, t0=t)[0]
+              for k, (t, _) in reached.items()}
+
+    gate_leg, last_leg = result['legs']
+    assert result['total_h'] == pytest.approx(min(totals.values()))
+    assert gate_leg['node'] != divmod(first, NLON)
+    assert last_leg['path'][0] == gate_leg['node']
+
+
+def test_degenerate_gate_behaves_like_a_point():
+    wind = random_wind(seed=5)
+    mark = point((5, 5))
+    assert gate_nodes(LAT2D, LON2D, mark, mark) == [(5, 5)]
+    as_gate = route_legs(wind, LAT2D, LON2D, point((1, 1)), [(mark, mark), point((9, 8))])
+    as_point = route_legs(wind, LAT2D, LON2D, point((1, 1)), [mark, point((9, 8))])
+    assert as_gate['total_h'] == pytest.approx(as_point['total_h'])
+    assert as_gate['path'] == as_point['path']
+
+
+def test_unreachable_mark():
+    result = route_legs(grid_wind(0.0, 0.0), LAT2D, LON2D, point((1, 1)), [point((9, 8))])
+    assert result['total_h'] == np.inf
+    assert result['eta'] is None and result['legs'] == [] and result['path'] == []
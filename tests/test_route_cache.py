@@ -0,0 +1,93 @@
+import numpy as np
+
+import route_cache
+from route_cache import RouteCache, normalize_query, run_id_from_time
+from routing import create_grid
+from routing_backends import HeadingBackend
+
+LAT2D, LON2D = create_grid(35.0, 50.0, -35.0, 0.0, resolution=1.0)
+START, END = (46.5, -1.8), (38.5, -28.6)
+
+
+def key(run_id, departure="2025-10-25T00:00", options=()):
+    return normalize_query(LAT2D, LON2D, START, END, np.datetime64(departure), run_id,
+                           options=options)
+
+
+def test_run_id_from_time():
+    assert run_id_from_time(np.datetime64("2025-10-25T06:00:00.000000000")) == "2025102506"
+
+
+def test_near_duplicate_queries_share_a_key():
+    a = key("2025102500", "2025-10-25T00:20")
+    b = normalize_query(LAT2D, LON2D, (46.4, -1.7), (38.4, -28.5),
+                        np.datetime64("2025-10-24T23:45"), "2025102500")
+    assert a == b
+
+
+def test_backend_parameters_are_part_of_the_key():
+    slow = HeadingBackend(penalty_h=0.5)
+    fast = HeadingBackend(penalty_h=0.1)
+    assert key("2025102500", options=(slow.name, *slow.params())) != \
+        key("2025102500", options=(fast.name, *fast.params()))
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path):
+    cache = RouteCache(disk_dir=tmp_path)
+    cache.put(key("2025102500"), (10.0, [(1, 1)]))
+
+    other = RouteCache(disk_dir=tmp_path)
+    assert other.get(key("2025102500")) == (10.0, [(1, 1)])
+    assert other.stats()["disk_hits"] == 1
+
+
+def test_newer_run_invalidates_both_tiers(tmp_path):
+    cache = RouteCache(disk_dir=tmp_path)
+    cache.put(key("2025102500"), (10.0, []))
+    cache.set_latest_run("2025102506")
+
+    assert cache.get(key("2025102500")) is None
+    assert not (tmp_path / "2025102500").exists()
+
+
+def test_stale_result_is_not_written_back(tmp_path):
+    cache = RouteCache(disk_dir=tmp_path)
+    old = key("2025102500")
+
+    def compute():
+        # un run plus récent arrive pendant le calcul
+        cache.set_latest_run("2025102506")
+        return (10.0, [])
+
+    assert cache.get_or_compute(old, compute) == (10.0, [])
+    assert cache.get(old) is None
+    assert not (tmp_path / "2025102500").exists()
+    assert cache.stats()["entries"] == 0
+
+
+def test_run_arriving_during_disk_write_discards_the_file(tmp_path, monkeypatch):
+    cache = RouteCache(disk_dir=tmp_path)
+    old = key("2025102500")
+    dump = route_cache.pickle.dump
+
+    def slow_dump(value, f):
+        cache.set_latest_run("2025102506")
+        dump(value, f)
+
+    monkeypatch.setattr(route_cache.pickle, "dump", slow_dump)
+    cache.put(old, (10.0, []))
+    assert cache.get(old) is None
+    assert list(tmp_path.rglob("*")) == []
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = RouteCache(max_entries=2, disk_dir=None)
+    a, b, c = (key("2025102500", f"2025-10-25T0{h}:00") for h in (0, 2, 4))
+    cache.put(a, (1.0, []))
+    cache.put(b, (2.0, []))
+    assert cache.get(a) == (1.0, [])  # a redevient le plus récent
+    cache.put(c, (3.0, []))
+
+    assert cache.stats()["entries"] == 2
+    assert cache.get(b) is None
+    assert cache.get(a) == (1.0, []) and cache.get(c) == (3.0, [])
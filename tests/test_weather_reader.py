@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+import xarray as xr
+
+from weather_reader import WindField, compute_wind_speed_direction, extract_wind
+
+
+def make_dataset(lat, lon, nt=3, seed=0):
+    rng = np.random.default_rng(seed)
+    shape = (nt, lat.size, lon.size)
+    times = np.datetime64("2025-10-21T00") + np.arange(nt) * np.timedelta64(3, "h")
+    coords = {"time": times, "latitude": lat, "longitude": lon}
+    dims = ("time", "latitude", "longitude")
+    return xr.Dataset({"u10": (dims, rng.normal(0, 8, shape)),
+                       "v10": (dims, rng.normal(0, 8, shape))}, coords=coords)
+
+
+@pytest.mark.parametrize("lat", [np.arange(50.0, 34.75, -0.25), np.arange(35.0, 50.01, 0.25)])
+def test_on_grid_matches_xarray_nearest(lat):
+    ds = make_dataset(lat, np.arange(-35.0, 0.01, 0.25))
+    wind = extract_wind(ds)
+
+    rng = np.random.default_rng(1)
+    lats = np.sort(rng.uniform(35.0, 50.0, 7))[::-1]
+    lons = np.sort(rng.uniform(-35.0, 0.0, 9))
+    lon2d, lat2d = np.meshgrid(lons, lats)
+    sampled = wind.on_grid(lat2d, lon2d)
+
+    expected = ds.sel(latitude=xr.DataArray(lats, dims="y"),
+                      longitude=xr.DataArray(lons, dims="x"), method="nearest")
+    np.testing.assert_array_equal(sampled.u, expected["u10"].values.astype(np.float32))
+    np.testing.assert_array_equal(sampled.v, expected["v10"].values.astype(np.float32))
+    np.testing.assert_array_equal(sampled.times, wind.times)
+
+
+def test_index_of_clips_outside_domain():
+    wind = extract_wind(make_dataset(np.arange(50.0, 34.75, -0.25), np.arange(-35.0, 0.01, 0.25)))
+    assert wind.index_of(60.0, -40.0) == (0, 0)
+    assert wind.index_of(20.0, 10.0) == (wind.lat.size - 1, wind.lon.size - 1)
+
+
+def test_speed_and_direction_cached_per_step():
+    wind = extract_wind(make_dataset(np.arange(50.0, 34.75, -0.25), np.arange(-35.0, 0.01, 0.25)))
+    speed, direction = compute_wind_speed_direction(wind.u[1], wind.v[1])
+    np.testing.assert_allclose(wind.speed(1), speed)
+    np.testing.assert_allclose(wind.direction(1), direction)
+    assert wind.speed(1) is wind.speed(1)
+    assert wind.direction(1) is wind.direction(1)
+    assert wind.speed(0) is not wind.speed(1)
+
+
+def test_step_returns_views_of_float32_contiguous_arrays():
+    wind = WindField(np.ones((2, 4, 5)), np.zeros((2, 4, 5)), np.arange(4.0), np.arange(5.0))
+    for arr in (wind.u, wind.v):
+        assert arr.dtype == np.float32
+        assert arr.flags["C_CONTIGUOUS"]
+    u, v = wind.step(1)
+    assert np.shares_memory(u, wind.u) and np.shares_memory(v, wind.v)
+    u[0, 0] = 7.0
+    assert wind.u[1, 0, 0] == 7.0
+
+
+def test_two_dimensional_field_gets_a_time_axis():
+    wind = WindField(np.ones((4, 5)), np.ones((4, 5)), np.arange(4.0), np.arange(5.0))
+    assert wind.shape == (1, 4, 5)
+    assert wind.hours().tolist() == [0.0]